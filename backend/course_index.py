@@ -0,0 +1,181 @@
+# Course Index - Search, autocomplete and lookup indexes over the course catalog, kept in flat arrays
+import math
+import re
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+# Course search ranking: a code match beats a title match, which beats a description match
+SEARCH_FIELD_WEIGHTS = {"code": 100.0, "title": 10.0, "description": 1.0}
+SEARCH_PREFIX_MATCH_FACTOR = 0.5
+SEARCH_MIN_PREFIX_LENGTH = 2
+# Prefixes up to this long match too many words to merge per query, so each one
+# gets its own merged, ranked postings list at build time
+SEARCH_MERGED_PREFIX_LENGTH = 3
+SEARCH_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Every index is a set of named sections: sorted key lists and flat number arrays
+Section = Union[array, List[str]]
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search tokens"""
+    return SEARCH_TOKEN_PATTERN.findall(text.lower())
+
+
+def _runs(groups: Dict[str, list], name: str, sections: Dict[str, Section], scored: bool = False):
+    """Store groups as sorted keys plus one flat array of every group's entries"""
+    keys = sorted(groups)
+    offsets = array("I", [0])
+    courses = array("I")
+    scores = array("d")
+    for key in keys:
+        if scored:
+            # Best first, ties in catalog order
+            entries = sorted(groups[key].items(), key=lambda entry: (-entry[1], entry[0]))
+            courses.extend(index for index, _ in entries)
+            scores.extend(score for _, score in entries)
+        else:
+            courses.extend(groups[key])
+        offsets.append(len(courses))
+
+    sections[name] = keys
+    sections[f"{name}.offsets"] = offsets
+    sections[f"{name}.courses"] = courses
+    if scored:
+        sections[f"{name}.scores"] = scores
+
+
+def _pairs(pairs: List[Tuple[str, int]], name: str, sections: Dict[str, Section]):
+    pairs.sort()
+    sections[name] = [key for key, _ in pairs]
+    sections[f"{name}.courses"] = array("I", (index for _, index in pairs))
+
+
+def build_search_index(codes: Sequence[Optional[str]], subjects: Sequence[str],
+                       titles: Sequence[str], descriptions: Sequence[str]) -> Dict[str, Section]:
+    """Build every catalog index from the code, subject, title and description columns"""
+    postings: Dict[str, Dict[int, float]] = {}
+    by_code: Dict[str, List[int]] = {}
+    by_subject: Dict[str, List[int]] = {}
+    subject_keys = []
+    code_keys = []
+    title_keys = []
+
+    def index_tokens(index: int, tokens: List[str], weight: float):
+        for token in set(tokens):
+            token_postings = postings.setdefault(token, {})
+            token_postings[index] = token_postings.get(index, 0.0) + weight
+
+    for index, (code, subject, title, description) in enumerate(zip(codes, subjects, titles, descriptions)):
+        if code is not None:
+            by_code.setdefault(code, []).append(index)
+        subject_key = subject.upper()
+        by_subject.setdefault(subject_key, []).append(index)
+        subject_keys.append(subject_key)
+
+        code_tokens = tokenize(code or '')
+        # "CSI 2110" is also indexed as "csi2110" so compact queries match
+        if len(code_tokens) > 1:
+            code_tokens.append("".join(code_tokens))
+        index_tokens(index, code_tokens, SEARCH_FIELD_WEIGHTS["code"])
+        index_tokens(index, tokenize(title), SEARCH_FIELD_WEIGHTS["title"])
+        index_tokens(index, tokenize(description), SEARCH_FIELD_WEIGHTS["description"])
+
+        # Autocomplete keys: the code with and without its space, the title, and each title word
+        code = " ".join((code or '').lower().split())
+        if code:
+            code_keys.append((code, index))
+            code_keys.append((code.replace(" ", ""), index))
+        title = " ".join(title.lower().split())
+        if title:
+            title_keys.append((title, index))
+            for word in set(tokenize(title)):
+                title_keys.append((word, index))
+
+    # Rarer tokens rank slightly higher without crossing field weight tiers
+    count = len(subject_keys)
+    max_idf = math.log(1 + count) or 1.0
+    for token_postings in postings.values():
+        factor = 1 + math.log(1 + count / len(token_postings)) / max_idf
+        for index in token_postings:
+            token_postings[index] *= factor
+
+    # Short prefixes: each course keeps its best score over all the words it matches
+    merged: Dict[str, Dict[int, float]] = {}
+    for token, token_postings in postings.items():
+        for length in range(SEARCH_MIN_PREFIX_LENGTH, min(len(token), SEARCH_MERGED_PREFIX_LENGTH) + 1):
+            prefix_postings = merged.setdefault(token[:length], {})
+            factor = 1.0 if length == len(token) else SEARCH_PREFIX_MATCH_FACTOR
+            for index, score in token_postings.items():
+                score *= factor
+                if score > prefix_postings.get(index, 0.0):
+                    prefix_postings[index] = score
+
+    sections: Dict[str, Section] = {}
+    _runs(postings, "tokens", sections, scored=True)
+    _runs(merged, "prefixes", sections, scored=True)
+    _runs(by_code, "codes", sections)
+    _runs(by_subject, "subjects", sections)
+    subject_ids = {key: position for position, key in enumerate(sections["subjects"])}
+    sections["subjects.of"] = array("I", (subject_ids[key] for key in subject_keys))
+    sections["subject_names"] = sorted(set(subject for subject in subjects if subject))
+    _pairs(code_keys, "suggest.codes", sections)
+    _pairs(title_keys, "suggest.titles", sections)
+    return sections
+
+
+class KeyedRuns:
+    """Sorted keys, each owning a run of course positions (and scores) in flat arrays"""
+
+    def __init__(self, sections, name: str):
+        self.keys = sections[name]
+        self.offsets = sections[f"{name}.offsets"]
+        self.courses = sections[f"{name}.courses"]
+        self.scores = sections.get(f"{name}.scores")
+
+    def find(self, key: str) -> int:
+        """Position of the key, or -1"""
+        position = bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            return position
+        return -1
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """Positions [start, end) of the keys starting with prefix: one contiguous run"""
+        start = end = bisect_left(self.keys, prefix)
+        while end < len(self.keys) and self.keys[end].startswith(prefix):
+            end += 1
+        return start, end
+
+    def courses_at(self, position: int) -> Sequence[int]:
+        return self.courses[self.offsets[position]:self.offsets[position + 1]]
+
+    def scores_at(self, position: int) -> Sequence[float]:
+        return self.scores[self.offsets[position]:self.offsets[position + 1]]
+
+    def get(self, key: str) -> Sequence[int]:
+        """Course positions for a key; empty when it is not indexed"""
+        position = self.find(key)
+        return self.courses_at(position) if position >= 0 else ()
+
+    def size(self, key: str) -> int:
+        position = self.find(key)
+        return self.offsets[position + 1] - self.offsets[position] if position >= 0 else 0
+
+
+class CourseIndex:
+    """Read-side view over the sections from build_search_index"""
+
+    def __init__(self, sections):
+        self.tokens = KeyedRuns(sections, "tokens")
+        self.prefixes = KeyedRuns(sections, "prefixes")
+        self.codes = KeyedRuns(sections, "codes")
+        self.subjects = KeyedRuns(sections, "subjects")
+        # Subject key position of every course, for filtering by subject
+        self.subject_of = sections["subjects.of"]
+        self.subject_names = sections["subject_names"]
+        self.suggest_code_keys = sections["suggest.codes"]
+        self.suggest_code_courses = sections["suggest.codes.courses"]
+        self.suggest_title_keys = sections["suggest.titles"]
+        self.suggest_title_courses = sections["suggest.titles.courses"]
@@ -0,0 +1,362 @@
+# Course Snapshot Builder - Compiles fast_scraped_courses.json into a binary, memory-mappable snapshot
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, List, Optional
+
+from course_index import build_search_index
+
+SOURCE_PATH = "fast_scraped_courses.json"
+SNAPSHOT_PATH = "fast_scraped_courses.snapshot"
+
+SNAPSHOT_MAGIC = b"SFCS"
+# Bump when the layout or anything build_search_index stores changes
+SNAPSHOT_VERSION = 2
+
+# magic, version, column count, row count, source size, source mtime (ns), source sha256
+HEADER = struct.Struct("<4sHHI4xQQ32s")
+# kind, array typecode, name length, item count, values position, data position
+COLUMN_ENTRY = struct.Struct("<1s1sHIQQ")
+
+# Column kinds:
+#   s - every row has a str: UTF-8 blob with uint32 byte offsets (rows + 1)
+#   i - every row has an int: int64 values
+#   j - anything else: same as s but the values are JSON-encoded, empty = key missing
+# Byte offsets let a single row be decoded in place.
+#
+# Index sections (from course_index.build_search_index) are not per row:
+#   a - a number array of `count` items with the entry's typecode
+#   k - `count` strings: uint32 byte offsets (count + 1) and a UTF-8 blob
+KIND_STRING = b"s"
+KIND_INT = b"i"
+KIND_JSON = b"j"
+KIND_ARRAY = b"a"
+KIND_KEYS = b"k"
+
+MISSING = object()
+
+
+def _align(size: int, boundary: int = 8) -> int:
+    return (size + boundary - 1) // boundary * boundary
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _read_array(buffer, typecode: str, position: int, count: int):
+    """Zero-copy view of a little-endian number array inside the snapshot"""
+    size = array(typecode).itemsize * count
+    view = memoryview(buffer)[position:position + size]
+    if sys.byteorder == "little":
+        return view.cast(typecode)
+    values = array(typecode, view.tobytes())
+    values.byteswap()
+    return values
+
+
+def source_fingerprint(path: str = SOURCE_PATH) -> Optional[tuple]:
+    """(size, mtime_ns) of the source file, or None when it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def source_digest(path: str = SOURCE_PATH) -> bytes:
+    """SHA-256 of the source file contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _column_kind(courses: List[Dict], name: str) -> bytes:
+    values = [course.get(name, MISSING) for course in courses]
+    if all(type(value) is str for value in values):
+        return KIND_STRING
+    if all(type(value) is int for value in values):
+        return KIND_INT
+    return KIND_JSON
+
+
+def _encode_keys(keys: List[str]) -> tuple:
+    """Return (values section, data blob) for a list of strings"""
+    offsets = array("I", [0])
+    blob = bytearray()
+    for key in keys:
+        blob += key.encode("utf-8")
+        offsets.append(len(blob))
+    return _little_endian(offsets), bytes(blob)
+
+
+def _encode_column(courses: List[Dict], name: str, kind: bytes) -> tuple:
+    """Return (values section, data blob) for one column"""
+    if kind == KIND_INT:
+        return _little_endian(array("q", (course[name] for course in courses))), b""
+
+    values = []
+    for course in courses:
+        value = course.get(name, MISSING)
+        if kind == KIND_JSON:
+            value = "" if value is MISSING else json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        values.append(value)
+    return _encode_keys(values)
+
+
+def build_snapshot(json_path: str = SOURCE_PATH, snapshot_path: str = SNAPSHOT_PATH) -> int:
+    """Compile the scraped course JSON into a snapshot file; returns the course count"""
+    fingerprint = source_fingerprint(json_path)
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    courses = json.loads(raw).get("courses", [])
+
+    names: List[str] = []
+    for course in courses:
+        for name in course:
+            if name not in names:
+                names.append(name)
+
+    kinds = [_column_kind(courses, name) for name in names]
+    typecodes = [b"\0"] * len(names)
+    counts = [len(courses)] * len(names)
+    sections = [_encode_column(courses, name, kind) for name, kind in zip(names, kinds)]
+
+    # The search and lookup indexes go in too, so workers map them instead of building them
+    index = build_search_index(
+        [course.get("code") for course in courses],
+        [course.get("subject", "") for course in courses],
+        [course.get("title", "") for course in courses],
+        [course.get("description", "") for course in courses]
+    )
+    for name, values in index.items():
+        names.append(name)
+        counts.append(len(values))
+        if isinstance(values, array):
+            kinds.append(KIND_ARRAY)
+            typecodes.append(values.typecode.encode("ascii"))
+            sections.append((_little_endian(values), b""))
+        else:
+            kinds.append(KIND_KEYS)
+            typecodes.append(b"\0")
+            sections.append(_encode_keys(values))
+
+    encoded_names = [name.encode("utf-8") for name in names]
+
+    # Layout: header, column directory, then each column's values and data, 8-byte aligned
+    position = HEADER.size
+    for encoded_name in encoded_names:
+        position += _align(COLUMN_ENTRY.size + len(encoded_name))
+
+    directory = bytearray()
+    body = bytearray()
+    for kind, typecode, count, encoded_name, (values, data) in zip(kinds, typecodes, counts, encoded_names, sections):
+        values_position = position
+        data_position = values_position + _align(len(values))
+        position = data_position + _align(len(data))
+
+        entry = COLUMN_ENTRY.pack(kind, typecode, len(encoded_name), count, values_position, data_position) + encoded_name
+        directory += entry.ljust(_align(len(entry)), b"\0")
+        body += values.ljust(_align(len(values)), b"\0")
+        body += data.ljust(_align(len(data)), b"\0")
+
+    header = HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(names), len(courses),
+        fingerprint[0], fingerprint[1], hashlib.sha256(raw).digest()
+    )
+
+    # Write next to the target and rename so readers never see a partial file
+    temp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(header)
+            f.write(directory)
+            f.write(body)
+        os.replace(temp_path, snapshot_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return len(courses)
+
+
+class SnapshotKeys(Sequence):
+    """A list of strings stored in the snapshot, decoded one item at a time
+
+    Sorted key lists are bisected in place, so a lookup decodes only the
+    few keys it compares against.
+    """
+
+    def __init__(self, snapshot_mmap, offsets, data_position: int):
+        self._mmap = snapshot_mmap
+        self._offsets = offsets
+        self._data_position = data_position
+        self._count = len(offsets) - 1
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("key index out of range")
+        start = self._data_position + self._offsets[index]
+        end = self._data_position + self._offsets[index + 1]
+        return self._mmap[start:end].decode("utf-8")
+
+
+class CourseSnapshot:
+    """Read-only, memory-mapped view of a compiled course snapshot"""
+
+    def __init__(self, path: str = SNAPSHOT_PATH):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, column_count, row_count, size, mtime_ns, sha256 = HEADER.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} course snapshot")
+
+        self.row_count = row_count
+        self.source_size = size
+        self.source_mtime_ns = mtime_ns
+        self.source_sha256 = sha256
+
+        self.columns = []
+        # Index sections by name: number arrays and SnapshotKeys, both read in place
+        self.sections: Dict[str, Any] = {}
+        position = HEADER.size
+        for _ in range(column_count):
+            kind, typecode, name_length, count, values_position, data_position = COLUMN_ENTRY.unpack_from(self._mmap, position)
+            name_start = position + COLUMN_ENTRY.size
+            name = self._mmap[name_start:name_start + name_length].decode("utf-8")
+            position = _align(name_start + name_length)
+
+            if kind == KIND_ARRAY:
+                self.sections[name] = _read_array(self._mmap, typecode.decode("ascii"), values_position, count)
+            elif kind == KIND_KEYS:
+                offsets = _read_array(self._mmap, "I", values_position, count + 1)
+                self.sections[name] = SnapshotKeys(self._mmap, offsets, data_position)
+            elif kind == KIND_INT:
+                values = _read_array(self._mmap, "q", values_position, row_count)
+                self.columns.append((name, kind, values, data_position))
+            else:
+                values = _read_array(self._mmap, "I", values_position, row_count + 1)
+                self.columns.append((name, kind, values, data_position))
+
+    def __len__(self):
+        return self.row_count
+
+    def is_fresh(self, json_path: str = SOURCE_PATH) -> bool:
+        """True if the snapshot was compiled from the current source file"""
+        fingerprint = source_fingerprint(json_path)
+        if fingerprint is None:
+            # Nothing newer to fall back to
+            return True
+        if fingerprint == (self.source_size, self.source_mtime_ns):
+            return True
+        # Touched but possibly unchanged: settle it with the content hash
+        return fingerprint[0] == self.source_size and source_digest(json_path) == self.source_sha256
+
+    def _value(self, kind: bytes, values, data_position: int, index: int):
+        if kind == KIND_INT:
+            return values[index]
+        start = data_position + values[index]
+        end = data_position + values[index + 1]
+        if kind == KIND_STRING:
+            return self._mmap[start:end].decode("utf-8")
+        if start == end:
+            return MISSING
+        return json.loads(self._mmap[start:end])
+
+    def row(self, index: int, fields: Optional[set] = None) -> Dict:
+        """Decode a single course, optionally only the given fields"""
+        course = {}
+        for name, kind, values, data_position in self.columns:
+            if fields is not None and name not in fields:
+                continue
+            value = self._value(kind, values, data_position, index)
+            if value is not MISSING:
+                course[name] = value
+        return course
+
+    def close(self):
+        views = [values for _, _, values, _ in self.columns]
+        for section in self.sections.values():
+            views.append(section._offsets if isinstance(section, SnapshotKeys) else section)
+        for values in views:
+            if isinstance(values, memoryview):
+                values.release()
+        self.columns = []
+        self.sections = {}
+        self._mmap.close()
+
+
+class CourseRecords(Sequence):
+    """List-like view over a snapshot that decodes a course only when it is accessed
+
+    The snapshot pages live in the OS page cache, so every worker process that
+    maps the same file shares one copy of the catalog.
+    """
+
+    def __init__(self, snapshot: CourseSnapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return self.snapshot.row_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.snapshot.row(i) for i in range(*index.indices(self.snapshot.row_count))]
+        if index < 0:
+            index += self.snapshot.row_count
+        if not 0 <= index < self.snapshot.row_count:
+            raise IndexError("course index out of range")
+        return self.snapshot.row(index)
+
+    def __iter__(self):
+        for index in range(self.snapshot.row_count):
+            yield self.snapshot.row(index)
+
+
+def load_snapshot(json_path: str = SOURCE_PATH, snapshot_path: str = SNAPSHOT_PATH) -> Optional[CourseSnapshot]:
+    """Open the snapshot if it exists and matches the source JSON, else None"""
+    if not os.path.exists(snapshot_path):
+        return None
+    try:
+        snapshot = CourseSnapshot(snapshot_path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"⚠️  Ignoring unreadable course snapshot: {e}")
+        return None
+    if not snapshot.is_fresh(json_path):
+        snapshot.close()
+        return None
+    return snapshot
+
+
+def main():
+    print("📦 Compiling course snapshot")
+    start_time = time.time()
+    try:
+        count = build_snapshot()
+    except FileNotFoundError:
+        print(f"❌ {SOURCE_PATH} not found!")
+        return
+    print(f"✅ Wrote {count} courses to {SNAPSHOT_PATH} in {time.time() - start_time:.2f} seconds")
+
+if __name__ == "__main__":
+    main()
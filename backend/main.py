@@ -1,40 +1,130 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Depends, status
+from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Depends, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 import json
 import os
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Sequence, Tuple
 import time
+import threading
+import hashlib
+import hmac
+import base64
+import gzip
+import zlib
+from contextlib import asynccontextmanager
+from collections import OrderedDict
+from itertools import compress
+import math
+import heapq
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from bisect import bisect_left
 from dotenv import load_dotenv
 import anthropic
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
 import jwt
 from datetime import datetime, timedelta, date
-import bcrypt
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, ValidationError
 import uuid
+import secrets
+import sqlite3
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+from course_index import (
+    SEARCH_MERGED_PREFIX_LENGTH, SEARCH_MIN_PREFIX_LENGTH, SEARCH_PREFIX_MATCH_FACTOR, CourseIndex,
+    build_search_index, tokenize
+)
+from course_snapshot import CourseRecords, build_snapshot, load_snapshot, source_digest, source_fingerprint
+from password_hashing import check_password, hash_password
+from starlette.concurrency import run_in_threadpool
 
 load_dotenv()
 
+# Claude is called through one async client per worker, so a slow answer never blocks the
+# event loop. The client keeps one connection pool for every chat; the semaphore caps how
+# many requests are in flight, and later chats wait for a free slot.
+CLAUDE_MODEL = "claude-3-5-haiku-20241022"
+CLAUDE_TEMPERATURE = 0.7
+CLAUDE_MAX_CONCURRENCY = int(os.getenv("CLAUDE_MAX_CONCURRENCY", "64"))
+CLAUDE_TIMEOUT_SECONDS = float(os.getenv("CLAUDE_TIMEOUT_SECONDS", "60"))
+CLAUDE_CONNECT_TIMEOUT_SECONDS = float(os.getenv("CLAUDE_CONNECT_TIMEOUT_SECONDS", "5"))
+CLAUDE_MAX_RETRIES = int(os.getenv("CLAUDE_MAX_RETRIES", "2"))
+# /ai/status probes Claude at most this often and answers from the last probe in between
+CLAUDE_STATUS_TTL_SECONDS = 60
+CLAUDE_STATUS_PROBE_TIMEOUT_SECONDS = 5
+CLAUDE_SEMAPHORE = asyncio.Semaphore(CLAUDE_MAX_CONCURRENCY)
+CLAUDE_STATUS = None
+
 # Initialize Claude client
 claude_client = None
+claude_available = False
 
 def initialize_claude():
     """Initialize Claude client with API key"""
     global claude_client
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if api_key:
-        claude_client = Anthropic(api_key=api_key)
+        claude_client = AsyncAnthropic(
+            api_key=api_key,
+            timeout=anthropic.Timeout(CLAUDE_TIMEOUT_SECONDS, connect=CLAUDE_CONNECT_TIMEOUT_SECONDS),
+            max_retries=CLAUDE_MAX_RETRIES
+        )
         print("✅ Claude client initialized")
         return True
     else:
         print("⚠️  Claude API key not found - using fallback responses")
         return False
 
-claude_available = initialize_claude()
+async def create_claude_message(client: AsyncAnthropic, **params):
+    """messages.create with the model and sampling settings every call uses
+
+    temperature goes in extra_body: the installed SDK's create() has no
+    temperature argument and raises TypeError on it, while the API accepts
+    it in the request body with any SDK version.
+    """
+    return await client.messages.create(model=CLAUDE_MODEL, extra_body={"temperature": CLAUDE_TEMPERATURE}, **params)
+
+def record_claude_status(working: bool):
+    """Remember whether the last Claude call worked; /ai/status answers from this until it expires"""
+    global CLAUDE_STATUS
+    if working:
+        CLAUDE_STATUS = (time.time(), "Claude API", CLAUDE_MODEL)
+    else:
+        CLAUDE_STATUS = (time.time(), "Enhanced Fallback (Claude Failed)", "Claude API key present but not working")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the user store and the Claude client, and start loading the course catalog
+
+    Startup work lives here rather than at import time: password hashing
+    workers are spawned processes, and when the server is started with
+    `python main.py` each of them imports this module again.
+    """
+    global PASSWORD_POOL, claude_available
+    load_users_from_file()
+    claude_available = initialize_claude()
+    start_catalog_warmup()
+    stop_watching = threading.Event()
+    if CATALOG_RELOAD_INTERVAL > 0:
+        threading.Thread(
+            target=watch_course_catalog, args=(stop_watching,), name="catalog-watcher", daemon=True
+        ).start()
+    yield
+    stop_watching.set()
+    if PASSWORD_POOL is not None:
+        PASSWORD_POOL.shutdown(wait=False, cancel_futures=True)
+        PASSWORD_POOL = None
+    if claude_client is not None:
+        await claude_client.close()
 
 # Create FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -45,19 +135,63 @@ app.add_middleware(
 )
 
 # Global variables
-COURSES_DATABASE = None
-SUBJECTS_CACHE = None
-USERS_DATABASE = {}
-ASSIGNMENTS_DATABASE = {}
-SCHEDULE_DATABASE = {}
+# Current CourseCatalog version; replaced wholesale on reload, never mutated
+COURSE_CATALOG = None
+CATALOG_LOAD_LOCK = threading.Lock()
+CATALOG_WARMUP_LOCK = threading.Lock()
+CATALOG_WARMUP_THREAD = None
+CATALOG_FAILED_FINGERPRINT = None
+CATALOG_RELOAD_INTERVAL = float(os.getenv("CATALOG_RELOAD_INTERVAL", "5"))
 
 # JWT Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-this-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Refresh tokens are opaque, single use and stored only as SHA-256. Each refresh swaps the
+# token for a new one with a fresh expiry, so an active session never has to re-enter a password.
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+# A token spent this recently is answered with its replacement again instead of being treated as
+# stolen, so parallel refreshes (two tabs, a retried request) do not end the session
+REFRESH_TOKEN_REUSE_GRACE_SECONDS = int(os.getenv("REFRESH_TOKEN_REUSE_GRACE_SECONDS", "10"))
+
+# Verified token -> claims, least recently used first. An entry lives until the token
+# expires or TOKEN_CACHE_TTL_SECONDS pass, whichever is sooner; the TTL bounds how long
+# another worker keeps accepting a token after it is revoked through logout.
+TOKEN_CACHE = OrderedDict()
+TOKEN_CACHE_LOCK = threading.Lock()
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60"))
+
+# bcrypt runs in its own processes so a login storm cannot starve the request threadpool.
+# Stored hashes with a different cost factor are upgraded on the next successful login.
+PASSWORD_HASH_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hashing jobs allowed to run or wait at once; beyond this, requests get a 503 straight away
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", str(PASSWORD_HASH_WORKERS * 16)))
+PASSWORD_POOL = None
+PASSWORD_JOBS = 0
+
 security = HTTPBearer()
 
+# Users live in an embedded SQLite database; each thread gets its own connection
+DATABASE_PATH = os.getenv("STUDYFLOW_DB_PATH", "studyflow.db")
+DB_LOCAL = threading.local()
+# Assignment ids each process reserves from the database at a time
+ASSIGNMENT_ID_BLOCK_SIZE = int(os.getenv("ASSIGNMENT_ID_BLOCK_SIZE", "64"))
+ASSIGNMENT_BATCH_MAX_SIZE = 500
+
+DAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+DAY_INDEX = {**{name.lower(): index for index, name in enumerate(DAY_NAMES)},
+             **{name[:3].lower(): index for index, name in enumerate(DAY_NAMES)}}
+
+SUGGEST_MAX_LIMIT = 25
+
+# Catalog responses for these limits are serialized and compressed once per catalog version
+CATALOG_CACHED_LIMITS = {50, 100, 200}
+CATALOG_RESPONSE_CACHE_SIZE = 256
+EXPORT_CHUNK_SIZE = 64
+
 # ============= PYDANTIC MODELS =============
 
 class UserCreate(BaseModel):
@@ -81,8 +215,12 @@ class UserResponse(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: str
     user: UserResponse
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class TimeSlot(BaseModel):
     day: str
     start_time: str
@@ -105,59 +243,516 @@ class AssignmentUpdate(BaseModel):
     priority: Optional[str] = None
     estimated_hours: Optional[float] = None
 
+class AssignmentBatchUpdate(AssignmentUpdate):
+    id: int
+
 # ============= UTILITY FUNCTIONS =============
 
-def save_users_to_file():
-    """Save users database to file for persistence"""
+def get_db() -> sqlite3.Connection:
+    """SQLite connection for the current thread"""
+    conn = getattr(DB_LOCAL, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DATABASE_PATH, timeout=30)
+        conn.row_factory = sqlite3.Row
+        # WAL: readers never block the writer, and a crash cannot leave a torn write
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        DB_LOCAL.conn = conn
+    return conn
+
+def init_database():
+    """Create tables and indexes if they do not exist yet
+
+    The composite (user_id, ...) assignment indexes also serve plain
+    user_id lookups, so there is no separate user_id index.
+    """
+    with get_db() as conn:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS users (
+                id TEXT PRIMARY KEY,
+                email TEXT NOT NULL,
+                email_normalized TEXT NOT NULL UNIQUE,
+                full_name TEXT NOT NULL,
+                student_id TEXT,
+                password_hash TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            );
+
+            -- One row per enrollment, so enrolling never rewrites the user row; id keeps enrollment order
+            CREATE TABLE IF NOT EXISTS user_courses (
+                id INTEGER PRIMARY KEY,
+                user_id TEXT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+                course_code TEXT NOT NULL,
+                UNIQUE (user_id, course_code)
+            );
+
+            CREATE TABLE IF NOT EXISTS assignments (
+                id INTEGER PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL DEFAULT '',
+                course_code TEXT NOT NULL,
+                due_date TEXT NOT NULL,
+                priority TEXT NOT NULL,
+                status TEXT NOT NULL,
+                estimated_hours REAL,
+                created_at TEXT NOT NULL,
+                due_day TEXT
+            );
+
+            CREATE TABLE IF NOT EXISTS schedule_courses (
+                id INTEGER PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                course_code TEXT NOT NULL,
+                course_title TEXT NOT NULL,
+                color TEXT NOT NULL,
+                is_personal INTEGER NOT NULL DEFAULT 0,
+                weekly_minutes INTEGER NOT NULL DEFAULT 0
+            );
+
+            CREATE TABLE IF NOT EXISTS schedule_slots (
+                id INTEGER PRIMARY KEY,
+                schedule_course_id INTEGER NOT NULL REFERENCES schedule_courses (id) ON DELETE CASCADE,
+                day TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                end_time TEXT NOT NULL,
+                location TEXT NOT NULL,
+                type TEXT NOT NULL,
+                day_index INTEGER,
+                start_minute INTEGER,
+                end_minute INTEGER
+            );
+        """)
+        
+        # The (user_id, course_code) index also serves plain user_id lookups, and the slot
+        # index leads with schedule_course_id so it also serves the foreign key cascade
+        conn.executescript("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_schedule_courses_user_code ON schedule_courses (user_id, course_code);
+            CREATE INDEX IF NOT EXISTS idx_schedule_slots_course_day_start ON schedule_slots (schedule_course_id, day_index, start_minute);
+        """)
+        
+        # Weekly minutes per course, kept current as slots come and go
+        conn.executescript("""
+            CREATE TRIGGER IF NOT EXISTS schedule_minutes_insert AFTER INSERT ON schedule_slots
+            BEGIN
+                UPDATE schedule_courses
+                SET weekly_minutes = weekly_minutes + COALESCE(NEW.end_minute - NEW.start_minute, 0)
+                WHERE id = NEW.schedule_course_id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS schedule_minutes_delete AFTER DELETE ON schedule_slots
+            BEGIN
+                UPDATE schedule_courses
+                SET weekly_minutes = weekly_minutes - COALESCE(OLD.end_minute - OLD.start_minute, 0)
+                WHERE id = OLD.schedule_course_id;
+            END;
+        """)
+        
+        conn.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_assignments_user_status ON assignments (user_id, status);
+            CREATE INDEX IF NOT EXISTS idx_assignments_user_course ON assignments (user_id, course_code);
+            CREATE INDEX IF NOT EXISTS idx_assignments_user_priority ON assignments (user_id, priority);
+            CREATE INDEX IF NOT EXISTS idx_assignments_user_due_day ON assignments (user_id, due_day);
+            -- Only open assignments, so counting overdue ones never walks completed history
+            CREATE INDEX IF NOT EXISTS idx_assignments_open_due_day ON assignments (user_id, due_day)
+                WHERE status != 'completed';
+        """)
+        
+        # Per-user status counters, kept current by triggers in the same transaction as each change
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS assignment_counters (
+                user_id TEXT PRIMARY KEY,
+                total INTEGER NOT NULL DEFAULT 0,
+                pending INTEGER NOT NULL DEFAULT 0,
+                in_progress INTEGER NOT NULL DEFAULT 0,
+                completed INTEGER NOT NULL DEFAULT 0
+            );
+
+            CREATE TRIGGER IF NOT EXISTS assignment_counters_insert AFTER INSERT ON assignments
+            BEGIN
+                INSERT OR IGNORE INTO assignment_counters (user_id) VALUES (NEW.user_id);
+                UPDATE assignment_counters SET
+                    total = total + 1,
+                    pending = pending + (NEW.status = 'pending'),
+                    in_progress = in_progress + (NEW.status = 'in_progress'),
+                    completed = completed + (NEW.status = 'completed')
+                WHERE user_id = NEW.user_id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS assignment_counters_update AFTER UPDATE OF status ON assignments
+            BEGIN
+                UPDATE assignment_counters SET
+                    pending = pending - (OLD.status = 'pending') + (NEW.status = 'pending'),
+                    in_progress = in_progress - (OLD.status = 'in_progress') + (NEW.status = 'in_progress'),
+                    completed = completed - (OLD.status = 'completed') + (NEW.status = 'completed')
+                WHERE user_id = NEW.user_id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS assignment_counters_delete AFTER DELETE ON assignments
+            BEGIN
+                UPDATE assignment_counters SET
+                    total = total - 1,
+                    pending = pending - (OLD.status = 'pending'),
+                    in_progress = in_progress - (OLD.status = 'in_progress'),
+                    completed = completed - (OLD.status = 'completed')
+                WHERE user_id = OLD.user_id;
+            END;
+        """)
+        
+        # Tokens ended by logout, keyed by SHA-256 so stored rows cannot be replayed
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS revoked_tokens (
+                token_hash TEXT PRIMARY KEY,
+                expires_at INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires ON revoked_tokens (expires_at);
+        """)
+        
+        # family_id links every token rotated from one login, so a replayed token can end the whole chain
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS refresh_tokens (
+                token_hash TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                family_id TEXT NOT NULL,
+                expires_at INTEGER NOT NULL,
+                replaced_by TEXT,
+                replaced_at INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user ON refresh_tokens (user_id);
+            CREATE INDEX IF NOT EXISTS idx_refresh_tokens_family ON refresh_tokens (family_id);
+            CREATE INDEX IF NOT EXISTS idx_refresh_tokens_expires ON refresh_tokens (expires_at);
+        """)
+        
+        # Next unreserved id per sequence; starts past any existing row so ids are never reused
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sequences (
+                name TEXT PRIMARY KEY,
+                next_value INTEGER NOT NULL
+            )
+        """)
+        conn.execute("""
+            INSERT OR IGNORE INTO sequences (name, next_value)
+            SELECT 'assignments', COALESCE(MAX(id), 0) + 1 FROM assignments
+        """)
+
+def parse_due_day(due_date: str) -> Optional[str]:
+    """Calendar day (YYYY-MM-DD) of an ISO due date, parsed once when it is stored"""
+    try:
+        return datetime.fromisoformat(due_date).date().isoformat()
+    except (TypeError, ValueError):
+        return None
+
+def parse_clock_time(value: str) -> Optional[int]:
+    """Minutes since midnight for "HH:MM", or None if it is not a valid time"""
     try:
-        with open('users_data.json', 'w') as f:
-            users_to_save = {}
-            for user_id, user_data in USERS_DATABASE.items():
-                user_copy = user_data.copy()
-                user_copy['created_at'] = user_data['created_at'].isoformat()
-                users_to_save[user_id] = user_copy
-            json.dump(users_to_save, f, indent=2)
-    except Exception as e:
-        print(f"Error saving users: {e}")
+        hours, minutes = map(int, value.split(":")[:2])
+    except (AttributeError, ValueError):
+        return None
+    if not (0 <= hours and 0 <= minutes < 60 and hours * 60 + minutes <= 24 * 60):
+        return None
+    return hours * 60 + minutes
+
+def format_clock_time(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def user_from_row(row: sqlite3.Row) -> dict:
+    return {
+        "id": row["id"],
+        "email": row["email"],
+        "full_name": row["full_name"],
+        "student_id": row["student_id"],
+        "password_hash": row["password_hash"],
+        "created_at": datetime.fromisoformat(row["created_at"]),
+        "enrolled_courses": enrolled_course_codes(row["id"])
+    }
+
+def save_user(user: dict, conn: Optional[sqlite3.Connection] = None):
+    """Insert or update one user row; O(1) regardless of how many users exist
+
+    Enrollments are separate rows, written by add_enrollment and remove_enrollment.
+    """
+    values = (
+        user["id"], user["email"], normalize_email(user["email"]), user["full_name"],
+        user.get("student_id"), user["password_hash"], user["created_at"].isoformat()
+    )
+    sql = """
+        INSERT INTO users (id, email, email_normalized, full_name, student_id, password_hash, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            email = excluded.email,
+            email_normalized = excluded.email_normalized,
+            full_name = excluded.full_name,
+            student_id = excluded.student_id,
+            password_hash = excluded.password_hash
+    """
+    if conn is not None:
+        conn.execute(sql, values)
+        return
+    with get_db() as conn:
+        conn.execute(sql, values)
+
+def save_password_hash(user_id: str, password_hash: str):
+    with get_db() as conn:
+        conn.execute("UPDATE users SET password_hash = ? WHERE id = ?", (password_hash, user_id))
+
+def enrolled_course_codes(user_id: str, conn: Optional[sqlite3.Connection] = None) -> List[str]:
+    """Course codes a user is enrolled in, in enrollment order"""
+    rows = (conn or get_db()).execute(
+        "SELECT course_code FROM user_courses WHERE user_id = ? ORDER BY id", (user_id,)
+    )
+    return [row["course_code"] for row in rows]
+
+def add_enrollment(user_id: str, course_code: str, conn: Optional[sqlite3.Connection] = None) -> bool:
+    """Enroll a user in one course; False if they already were"""
+    sql = "INSERT INTO user_courses (user_id, course_code) VALUES (?, ?) ON CONFLICT DO NOTHING"
+    if conn is not None:
+        return conn.execute(sql, (user_id, course_code)).rowcount > 0
+    with get_db() as conn:
+        return conn.execute(sql, (user_id, course_code)).rowcount > 0
+
+def remove_enrollment(user_id: str, course_code: str, conn: sqlite3.Connection) -> bool:
+    """Unenroll a user from one course; False if they were not enrolled"""
+    cursor = conn.execute(
+        "DELETE FROM user_courses WHERE user_id = ? AND course_code = ?", (user_id, course_code)
+    )
+    return cursor.rowcount > 0
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+def get_user(user_id: str) -> Optional[dict]:
+    """User by id, read from the database so every worker sees the latest changes"""
+    row = get_db().execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+    return user_from_row(row) if row else None
+
+def find_user_by_email(email: str) -> Optional[dict]:
+    """User by email, case-insensitive, through the unique email_normalized index"""
+    row = get_db().execute(
+        "SELECT * FROM users WHERE email_normalized = ?", (normalize_email(email),)
+    ).fetchone()
+    return user_from_row(row) if row else None
+
+def import_users_from_json(conn: sqlite3.Connection) -> int:
+    """One-time migration of the legacy users_data.json into the database"""
+    with open('users_data.json', 'r') as f:
+        users_loaded = json.load(f)
+    
+    imported = set()
+    for user_id, user_data in users_loaded.items():
+        email = normalize_email(user_data['email'])
+        if email in imported:
+            print(f"⚠️  Skipping user {user_id}: duplicate email {user_data['email']}")
+            continue
+        user_data['created_at'] = datetime.fromisoformat(user_data['created_at'])
+        save_user(user_data, conn)
+        for course_code in user_data.get('enrolled_courses', []):
+            add_enrollment(user_id, course_code, conn)
+        imported.add(email)
+    return len(imported)
 
 def load_users_from_file():
-    """Load users database from file"""
-    global USERS_DATABASE
+    """Open the user store, importing the legacy JSON file on first start"""
     try:
-        if os.path.exists('users_data.json'):
-            with open('users_data.json', 'r') as f:
-                users_loaded = json.load(f)
-                for user_id, user_data in users_loaded.items():
-                    user_data['created_at'] = datetime.fromisoformat(user_data['created_at'])
-                    USERS_DATABASE[user_id] = user_data
-            print(f"✅ Loaded {len(USERS_DATABASE)} users from file")
+        init_database()
+        conn = get_db()
+        with conn:
+            # First start on SQLite: carry over the old JSON file
+            empty = conn.execute("SELECT 1 FROM users LIMIT 1").fetchone() is None
+            if empty and os.path.exists('users_data.json'):
+                count = import_users_from_json(conn)
+                print(f"📦 Imported {count} users from users_data.json")
+        
+        count = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        print(f"✅ Loaded {count} users from {DATABASE_PATH}")
     except Exception as e:
         print(f"Error loading users: {e}")
 
-load_users_from_file()
+def get_password_pool() -> ProcessPoolExecutor:
+    global PASSWORD_POOL
+    if PASSWORD_POOL is None:
+        # spawn: never fork a process that holds SQLite connections and background threads
+        PASSWORD_POOL = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return PASSWORD_POOL
 
-def hash_password(password: str) -> str:
-    """Hash password using bcrypt"""
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+async def run_password_job(function, *args):
+    """Run a bcrypt function in the worker pool, or fail fast with 503 if too many are queued
 
-def verify_password(password: str, hashed: str) -> bool:
-    """Verify password against hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    Only touched from the event loop thread, so the job counter needs no lock.
+    """
+    global PASSWORD_JOBS, PASSWORD_POOL
+    if PASSWORD_JOBS >= PASSWORD_HASH_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in requests right now, please try again shortly",
+            headers={"Retry-After": "1"}
+        )
+    PASSWORD_JOBS += 1
+    pool = get_password_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, function, *args)
+    except BrokenProcessPool:
+        # A worker died; drop the pool so the next job starts a fresh one
+        if PASSWORD_POOL is pool:
+            PASSWORD_POOL = None
+            pool.shutdown(wait=False, cancel_futures=True)
+        print("⚠️  Password worker pool broke; restarting it")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Sign-in is temporarily unavailable, please try again shortly",
+            headers={"Retry-After": "1"}
+        )
+    finally:
+        PASSWORD_JOBS -= 1
+
+async def hash_password_async(password: str) -> str:
+    return await run_password_job(hash_password, password, PASSWORD_HASH_ROUNDS)
+
+async def verify_password_async(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """(matches, upgraded hash or None)"""
+    return await run_password_job(check_password, password, hashed, PASSWORD_HASH_ROUNDS)
 
 def create_access_token(data: dict):
     """Create JWT access token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # jti keeps two tokens issued in the same second distinct, so logging one out leaves the other valid
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def cached_token_claims(token: str) -> Optional[dict]:
+    now = time.time()
+    with TOKEN_CACHE_LOCK:
+        entry = TOKEN_CACHE.get(token)
+        if entry is None:
+            return None
+        claims, valid_until = entry
+        if valid_until <= now:
+            del TOKEN_CACHE[token]
+            return None
+        TOKEN_CACHE.move_to_end(token)
+        return claims
+
+def cache_token_claims(token: str, claims: dict):
+    valid_until = min(claims["exp"], time.time() + TOKEN_CACHE_TTL_SECONDS)
+    with TOKEN_CACHE_LOCK:
+        TOKEN_CACHE[token] = (claims, valid_until)
+        TOKEN_CACHE.move_to_end(token)
+        while len(TOKEN_CACHE) > TOKEN_CACHE_SIZE:
+            TOKEN_CACHE.popitem(last=False)
+
+def is_token_revoked(token: str) -> bool:
+    return get_db().execute(
+        "SELECT 1 FROM revoked_tokens WHERE token_hash = ?", (token_hash(token),)
+    ).fetchone() is not None
+
+def revoke_token(token: str, expires_at: float):
+    """Reject this token from now on, in every worker, until it would have expired anyway"""
+    with get_db() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO revoked_tokens (token_hash, expires_at) VALUES (?, ?)",
+            (token_hash(token), int(math.ceil(expires_at)))
+        )
+        conn.execute("DELETE FROM revoked_tokens WHERE expires_at < ?", (int(time.time()),))
+    with TOKEN_CACHE_LOCK:
+        TOKEN_CACHE.pop(token, None)
+
+def issue_refresh_token(user_id: str, family_id: Optional[str] = None) -> str:
+    """Start a refresh token chain for a fresh login, or continue one"""
+    token = secrets.token_urlsafe(32)
+    now = int(time.time())
+    with get_db() as conn:
+        conn.execute("DELETE FROM refresh_tokens WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "INSERT INTO refresh_tokens (token_hash, user_id, family_id, expires_at) VALUES (?, ?, ?, ?)",
+            (token_hash(token), user_id, family_id or uuid.uuid4().hex, now + REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+        )
+    return token
+
+def replacement_refresh_token(token: str) -> str:
+    """The token a refresh token rotates to; derived from it, so a retry can be given the same one"""
+    digest = hmac.new(SECRET_KEY.encode("utf-8"), b"refresh:" + token.encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode("ascii").rstrip("=")
+
+def rotate_refresh_token(token: str) -> Optional[Tuple[str, str]]:
+    """Spend a refresh token; returns (user id, replacement token), or None if it is not valid
+
+    Presenting a token again within REFRESH_TOKEN_REUSE_GRACE_SECONDS of
+    spending it returns the same replacement. Any later reuse means someone
+    else holds a copy, so every token in its chain is revoked.
+    """
+    replacement = replacement_refresh_token(token)
+    now = int(time.time())
+    with get_db() as conn:
+        # Claiming the old token first makes concurrent refreshes with the same token race safely
+        claimed = conn.execute(
+            """
+            UPDATE refresh_tokens SET replaced_by = ?, replaced_at = ?
+            WHERE token_hash = ? AND replaced_by IS NULL AND expires_at > ?
+            RETURNING user_id, family_id
+            """,
+            (token_hash(replacement), now, token_hash(token), now)
+        ).fetchone()
+        if claimed is None:
+            # Lost a race with a parallel refresh a moment ago: hand out the same replacement
+            recent = conn.execute(
+                "SELECT user_id FROM refresh_tokens WHERE token_hash = ? AND replaced_by = ? AND replaced_at >= ?",
+                (token_hash(token), token_hash(replacement), now - REFRESH_TOKEN_REUSE_GRACE_SECONDS)
+            ).fetchone()
+            if recent is not None:
+                return recent["user_id"], replacement
+            conn.execute(
+                """
+                DELETE FROM refresh_tokens WHERE family_id = (
+                    SELECT family_id FROM refresh_tokens WHERE token_hash = ? AND replaced_by IS NOT NULL
+                )
+                """,
+                (token_hash(token),)
+            )
+            return None
+        conn.execute(
+            "INSERT INTO refresh_tokens (token_hash, user_id, family_id, expires_at) VALUES (?, ?, ?, ?)",
+            (token_hash(replacement), claimed["user_id"], claimed["family_id"], now + REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+        )
+    return claimed["user_id"], replacement
+
+def revoke_refresh_token(token: str, user_id: str):
+    """End the session chain a refresh token belongs to"""
+    with get_db() as conn:
+        conn.execute(
+            """
+            DELETE FROM refresh_tokens WHERE family_id = (
+                SELECT family_id FROM refresh_tokens WHERE token_hash = ? AND user_id = ?
+            )
+            """,
+            (token_hash(token), user_id)
+        )
+
+def revoke_user_refresh_tokens(user_id: str):
+    """End every session of a user"""
+    with get_db() as conn:
+        conn.execute("DELETE FROM refresh_tokens WHERE user_id = ?", (user_id,))
+
+def decode_token(token: str) -> dict:
+    """Claims of a valid, unrevoked token; a signature check only on a cache miss"""
+    claims = cached_token_claims(token)
+    if claims is None:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["exp"]})
+        if is_token_revoked(token):
+            raise jwt.InvalidTokenError("Token has been revoked")
+        cache_token_claims(token, claims)
+    return claims
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verify JWT token and return current user"""
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(credentials.credentials)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(
@@ -166,7 +761,7 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        user = USERS_DATABASE.get(user_id)
+        user = get_user(user_id)
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -182,53 +777,479 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+class CourseCatalog:
+    """Course list with lookup and search indexes built once at load time
+
+    `courses` is either a list of dicts or snapshot-backed CourseRecords. With
+    a snapshot, the indexes were compiled into it and are read in place from
+    the shared mapping, and only the courses a response uses become dicts.
+    """
+
+    def __init__(self, courses: Sequence):
+        self.courses = courses
+        if isinstance(courses, CourseRecords):
+            sections = courses.snapshot.sections
+        else:
+            sections = build_search_index(
+                [course.get('code') for course in courses],
+                [course.get('subject', '') for course in courses],
+                [course.get('title', '') for course in courses],
+                [course.get('description', '') for course in courses]
+            )
+        self.index = CourseIndex(sections)
+        # Names a `fields` filter can select
+        if isinstance(courses, CourseRecords):
+            self.fields = frozenset(name for name, *_ in courses.snapshot.columns)
+        else:
+            self.fields = frozenset(name for course in courses for name in course)
+        # Set by the loader; identifies which course file this catalog came from
+        self.version = "empty"
+        self.source_digest: Optional[bytes] = None
+        self.source_fingerprint: Optional[tuple] = None
+        # Pre-encoded response bodies for this version, keyed by endpoint and parameters
+        self.response_cache: Dict[str, "EncodedBody"] = {}
+        self.subjects = list(self.index.subject_names)
+
+    def __len__(self):
+        return len(self.courses)
+
+    def get(self, code: str) -> Optional[dict]:
+        """Get the first course with this exact code"""
+        indexes = self.index.codes.get(code)
+        return self.courses[indexes[0]] if indexes else None
+
+    def subject_indexes(self, subject: str) -> Sequence[int]:
+        """Get catalog positions of all courses in a subject (case-insensitive)"""
+        return self.index.subjects.get(subject.upper())
+
+    def courses_for_subject(self, subject: str, limit: Optional[int] = None) -> List[dict]:
+        """Get the first `limit` courses in a subject (all by default), in catalog order"""
+        indexes = self.subject_indexes(subject)
+        return [self.courses[i] for i in indexes[:limit]]
+
+    def project(self, index: int, fields: Optional[set] = None) -> dict:
+        """Course at a catalog position, limited to the given fields"""
+        if fields is None:
+            return self.courses[index]
+        if isinstance(self.courses, CourseRecords):
+            # Decodes only the requested columns
+            return self.courses.snapshot.row(index, fields)
+        return {name: value for name, value in self.courses[index].items() if name in fields}
+
+    def page(self, start: int, limit: int, fields: Optional[set] = None) -> List[dict]:
+        """Courses in catalog order from a position, limited to the given fields"""
+        end = min(start + max(limit, 0), len(self.courses))
+        return [self.project(index, fields) for index in range(start, end)]
+
+    def cursor(self, index: int) -> str:
+        """Opaque cursor pointing just after a catalog position"""
+        code = self.project(index, {'code'}).get('code', '')
+        token = f"{index}:{code}"
+        return base64.urlsafe_b64encode(token.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def resume(self, cursor: str) -> Optional[int]:
+        """Position to continue from for a cursor, or None if it is not valid here"""
+        try:
+            token = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+            index, code = token.split(":", 1)
+            index = int(index)
+        except (ValueError, UnicodeDecodeError):
+            return None
+        
+        if 0 <= index < len(self.courses) and self.project(index, {'code'}).get('code', '') == code:
+            return index + 1
+        # The catalog was reloaded since the cursor was issued: continue after that code
+        indexes = self.index.codes.get(code)
+        return indexes[-1] + 1 if indexes else None
+
+    def courses_for_codes(self, codes: List[str]) -> List[dict]:
+        """Get every course matching one of the codes, in catalog order"""
+        indexes = []
+        for code in set(codes):
+            indexes.extend(self.index.codes.get(code))
+        indexes.sort()
+        return [self.courses[i] for i in indexes]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """Autocomplete (code, title) pairs; code matches come before title matches"""
+        prefix = " ".join(prefix.lower().split())
+        if not prefix or limit <= 0:
+            return []
+
+        seen = set()
+        suggestions = []
+        for keys, indexes in ((self.index.suggest_code_keys, self.index.suggest_code_courses),
+                              (self.index.suggest_title_keys, self.index.suggest_title_courses)):
+            position = bisect_left(keys, prefix)
+            while position < len(keys) and keys[position].startswith(prefix):
+                index = indexes[position]
+                position += 1
+                if index in seen:
+                    continue
+                seen.add(index)
+                course = self.project(index, {'code', 'title'})
+                suggestions.append((course.get('code', ''), course.get('title', '')))
+                if len(suggestions) >= limit:
+                    return suggestions
+
+        return suggestions
+
+    def _term_runs(self, term: str, prefix: bool) -> List[tuple]:
+        """(course positions, scores, factor) runs a query term matches, each ranked best first"""
+        tokens = self.index.tokens
+        if prefix:
+            # Short prefixes have one pre-merged run; longer ones expand over the
+            # sorted vocabulary, where the words they match are one contiguous run
+            if len(term) <= SEARCH_MERGED_PREFIX_LENGTH:
+                position = self.index.prefixes.find(term)
+                if position >= 0:
+                    return [(self.index.prefixes.courses_at(position), self.index.prefixes.scores_at(position), 1.0)]
+            positions = range(*tokens.prefix_range(term))
+        else:
+            position = tokens.find(term)
+            positions = [position] if position >= 0 else []
+        
+        return [
+            (tokens.courses_at(position), tokens.scores_at(position),
+             1.0 if tokens.keys[position] == term else SEARCH_PREFIX_MATCH_FACTOR)
+            for position in positions
+        ]
+
+    def _score_term(self, term: str, prefix: bool, scores: Optional[Dict[int, float]]) -> Dict[int, float]:
+        """Add one query term's score to the running scores, dropping courses it misses"""
+        runs = self._term_runs(term, prefix)
+        if scores is None and len(runs) == 1 and runs[0][2] == 1.0:
+            # The first term of a query takes its run as is
+            return dict(zip(runs[0][0], runs[0][1]))
+        
+        matched: Dict[int, float] = {}
+        for courses, weights, factor in runs:
+            hits = zip(courses, weights)
+            if scores is not None:
+                # Filtered without a Python-level loop; only surviving courses get scored
+                hits = compress(hits, map(scores.__contains__, courses))
+            for index, weight in hits:
+                score = weight * factor
+                if score > matched.get(index, 0.0):
+                    matched[index] = score
+
+        if scores is not None:
+            for index in matched:
+                matched[index] += scores[index]
+        return matched
+
+    def search(self, q: Optional[str] = None, subject: Optional[str] = None, limit: int = 50) -> Tuple[List[dict], int]:
+        """Ranked search; returns the top courses and the total number of matches"""
+        terms = tokenize(q) if q else []
+        limit = max(limit, 0)
+
+        if q and not terms:
+            # Only punctuation or spaces: nothing can match
+            return [], 0
+
+        if not terms:
+            indexes = self.subject_indexes(subject) if subject else range(len(self.courses))
+            return [self.courses[i] for i in indexes[:limit]], len(indexes)
+
+        subject_id = None
+        if subject:
+            subject_id = self.index.subjects.find(subject.upper())
+            if subject_id < 0:
+                return [], 0
+
+        # Every term has to match. The last one is a prefix for type-ahead, and
+        # the rarest exact terms go first so later terms only touch survivors.
+        matchers = [
+            (term, position == len(terms) - 1 and len(term) >= SEARCH_MIN_PREFIX_LENGTH)
+            for position, term in enumerate(terms)
+        ]
+        matchers.sort(key=lambda m: (m[1], self.index.tokens.size(m[0])))
+
+        if len(matchers) == 1:
+            runs = self._term_runs(*matchers[0])
+            if len(runs) == 1:
+                # A single run is already ranked, so there is nothing to merge or sort
+                indexes = runs[0][0]
+                if subject_id is not None:
+                    subject_of = self.index.subject_of
+                    indexes = [i for i in indexes if subject_of[i] == subject_id]
+                return [self.courses[i] for i in indexes[:limit]], len(indexes)
+
+        scores: Optional[Dict[int, float]] = None
+        for term, prefix in matchers:
+            scores = self._score_term(term, prefix, scores)
+            if not scores:
+                return [], 0
+
+        if subject_id is not None:
+            subject_of = self.index.subject_of
+            scores = {i: score for i, score in scores.items() if subject_of[i] == subject_id}
+
+        top = heapq.nlargest(limit, scores, key=lambda i: (scores[i], -i))
+        return [self.courses[i] for i in top], len(scores)
+
+EMPTY_CATALOG = CourseCatalog([])
+
 def load_courses_efficiently():
     """Load all courses efficiently"""
-    global COURSES_DATABASE, SUBJECTS_CACHE
-    
-    if COURSES_DATABASE is not None:
-        return COURSES_DATABASE
-    
+    catalog = COURSE_CATALOG
+    if catalog is not None:
+        return catalog.courses
+    
+    # Concurrent first callers wait here so the file is only loaded once
+    with CATALOG_LOAD_LOCK:
+        if COURSE_CATALOG is None:
+            _swap_catalog(build_course_catalog())
+        return COURSE_CATALOG.courses if COURSE_CATALOG else []
+
+def build_course_catalog() -> Optional[CourseCatalog]:
+    """Load and index a new catalog version from the snapshot or JSON file"""
     try:
         print("📚 Loading all courses...")
         start_time = time.time()
+        # Taken before reading so a write that lands mid-load is seen as a change
+        fingerprint = source_fingerprint("fast_scraped_courses.json")
+        
+        # Serve from the memory-mapped snapshot so every worker shares one copy
+        # of the catalog; (re)compile it first when it is missing or stale
+        snapshot = load_snapshot()
+        if snapshot is None and fingerprint is not None:
+            try:
+                build_snapshot()
+                snapshot = load_snapshot()
+            except Exception as e:
+                print(f"⚠️  Could not compile course snapshot: {e}")
         
-        if os.path.exists("fast_scraped_courses.json"):
-            with open("fast_scraped_courses.json", 'r') as f:
-                data = json.load(f)
-                COURSES_DATABASE = data.get('courses', [])
-                
-                SUBJECTS_CACHE = list(set(course.get('subject', '') for course in COURSES_DATABASE if course.get('subject')))
-                SUBJECTS_CACHE.sort()
-                
-                load_time = time.time() - start_time
-                print(f"✅ Loaded {len(COURSES_DATABASE)} courses in {load_time:.2f} seconds")
-                
-                return COURSES_DATABASE
+        if snapshot is not None:
+            courses = CourseRecords(snapshot)
+            digest = snapshot.source_sha256
+            source = "snapshot"
+        elif fingerprint is not None:
+            with open("fast_scraped_courses.json", 'rb') as f:
+                raw = f.read()
+            courses = json.loads(raw).get('courses', [])
+            digest = hashlib.sha256(raw).digest()
+            source = "JSON"
         else:
             print("❌ fast_scraped_courses.json not found!")
-            return []
+            return None
+        
+        catalog = CourseCatalog(courses)
+        catalog.version = digest.hex()[:16]
+        catalog.source_digest = digest
+        catalog.source_fingerprint = fingerprint
+        
+        load_time = time.time() - start_time
+        print(f"✅ Loaded {len(courses)} courses from {source} in {load_time:.2f} seconds")
+        
+        return catalog
             
     except Exception as e:
         print(f"❌ Error loading courses: {e}")
-        return []
+        return None
+
+def _swap_catalog(catalog: Optional[CourseCatalog]):
+    """Publish a catalog version with one reference assignment; callers hold CATALOG_LOAD_LOCK"""
+    global COURSE_CATALOG
+    if catalog is not None:
+        COURSE_CATALOG = catalog
+
+def get_course_catalog() -> CourseCatalog:
+    """Get the current catalog version, loading it if needed
+
+    Handlers read this once and use the returned object for the whole
+    request, so a reload that lands mid-request cannot mix two versions.
+    """
+    catalog = COURSE_CATALOG
+    if catalog is None:
+        load_courses_efficiently()
+        catalog = COURSE_CATALOG
+    return catalog or EMPTY_CATALOG
+
+def catalog_ready() -> bool:
+    """True once the course catalog is loaded and indexed"""
+    return COURSE_CATALOG is not None
+
+def catalog_source_changed(catalog: CourseCatalog) -> bool:
+    """True if the course file on disk differs from the one the catalog was built from"""
+    fingerprint = source_fingerprint("fast_scraped_courses.json")
+    if fingerprint is None or fingerprint == catalog.source_fingerprint:
+        return False
+    try:
+        if source_digest("fast_scraped_courses.json") == catalog.source_digest:
+            # Touched but unchanged
+            catalog.source_fingerprint = fingerprint
+            return False
+    except OSError:
+        return False
+    return True
+
+def reload_course_catalog() -> bool:
+    """Rebuild the catalog off the request path if its file changed; True if swapped"""
+    global CATALOG_FAILED_FINGERPRINT
+    
+    with CATALOG_LOAD_LOCK:
+        current = COURSE_CATALOG
+        fingerprint = source_fingerprint("fast_scraped_courses.json")
+        if current is None or fingerprint == CATALOG_FAILED_FINGERPRINT or not catalog_source_changed(current):
+            return False
+        print("🔄 Course file changed, reloading catalog...")
+        catalog = build_course_catalog()
+        # A half-written file fails to load; keep serving the old version
+        # until the file changes again
+        if catalog is None:
+            CATALOG_FAILED_FINGERPRINT = fingerprint
+            return False
+        _swap_catalog(catalog)
+        print(f"✅ Course catalog is now version {catalog.version}")
+        return True
 
-def calculate_weekly_hours(time_slots: List[dict]) -> float:
-    """Calculate total hours per week from time slots"""
-    total_minutes = 0
-    for slot in time_slots:
+def watch_course_catalog(stop_event: threading.Event):
+    """Poll the course file and hot-swap the catalog when it changes"""
+    while not stop_event.wait(CATALOG_RELOAD_INTERVAL):
         try:
-            start_hour, start_min = map(int, slot["start_time"].split(":"))
-            end_hour, end_min = map(int, slot["end_time"].split(":"))
-            
-            start_total_min = start_hour * 60 + start_min
-            end_total_min = end_hour * 60 + end_min
-            
-            total_minutes += (end_total_min - start_total_min)
-        except:
-            pass
+            reload_course_catalog()
+        except Exception as e:
+            print(f"❌ Error reloading courses: {e}")
+
+def start_catalog_warmup():
+    """Load the course catalog in a background thread unless it is loaded or loading"""
+    global CATALOG_WARMUP_THREAD
+    
+    with CATALOG_WARMUP_LOCK:
+        if catalog_ready() or (CATALOG_WARMUP_THREAD and CATALOG_WARMUP_THREAD.is_alive()):
+            return
+        CATALOG_WARMUP_THREAD = threading.Thread(
+            target=load_courses_efficiently, name="catalog-warmup", daemon=True
+        )
+        CATALOG_WARMUP_THREAD.start()
+
+class EncodedBody:
+    """A JSON response serialized once, with its compressed variants"""
+
+    __slots__ = ("etag", "identity", "gzip", "br")
+
+    def __init__(self, content: dict, etag: str):
+        self.etag = etag
+        # Same encoding FastAPI's JSONResponse uses
+        self.identity = json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        self.gzip = gzip.compress(self.identity, compresslevel=9, mtime=0)
+        self.br = brotli.compress(self.identity) if brotli else None
+
+def catalog_etag(catalog: CourseCatalog, key: str, encoding: Optional[str] = None) -> str:
+    """Strong ETag for one encoding of a catalog response: catalog version, request parameters, encoding"""
+    suffix = f"-{encoding}" if encoding else ""
+    return f'"{catalog.version}-{zlib.crc32(key.encode("utf-8")):08x}{suffix}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if If-None-Match names this exact response (weak comparison)"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+def accepted_encodings(accept_encoding: Optional[str]) -> set:
+    encodings = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name:
+            encodings.add(name.strip().lower())
+    return encodings
+
+def catalog_response(request: Request, catalog: CourseCatalog, key: str, build, cache: bool = True) -> Response:
+    """Serve a catalog-derived JSON body with ETag revalidation and precompression"""
+    precompressed = key in catalog.response_cache or (cache and len(catalog.response_cache) < CATALOG_RESPONSE_CACHE_SIZE)
+    encoding = None
+    if precompressed:
+        encodings = accepted_encodings(request.headers.get("accept-encoding"))
+        if brotli is not None and "br" in encodings:
+            encoding = "br"
+        elif "gzip" in encodings:
+            encoding = "gzip"
+    
+    # Each encoding is a different byte sequence, so it gets its own strong ETag
+    etag = catalog_etag(catalog, key, encoding)
+    headers = {"ETag": etag, "Cache-Control": "public, no-cache", "Vary": "Accept-Encoding"}
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    if not precompressed:
+        return Response(content=json.dumps(build(), ensure_ascii=False, allow_nan=False, separators=(",", ":")),
+                        media_type="application/json", headers=headers)
+    
+    body = catalog.response_cache.get(key)
+    if body is None:
+        body = EncodedBody(build(), catalog_etag(catalog, key))
+        catalog.response_cache[key] = body
+    
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    content = getattr(body, encoding or "identity")
+    
+    return Response(content=content, media_type="application/json", headers=headers)
+
+def parse_time_slot(slot: dict) -> Tuple[dict, Tuple[int, int, int]]:
+    """Validate a time slot once, when it is stored
+
+    Returns the slot with a canonical day name and HH:MM times, and its
+    (day index, start minute, end minute) for the pre-parsed columns.
+    """
+    day_index = DAY_INDEX.get(str(slot.get("day", "")).strip().lower())
+    start = parse_clock_time(slot.get("start_time"))
+    end = parse_clock_time(slot.get("end_time"))
+    if day_index is None or start is None or end is None or start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Time slot needs a weekday and HH:MM start and end times, with start before end"
+        )
+    normalized = {
+        **slot,
+        "day": DAY_NAMES[day_index],
+        "start_time": format_clock_time(start),
+        "end_time": format_clock_time(end)
+    }
+    return normalized, (day_index, start, end)
+
+def find_schedule_conflicts(intervals: List[tuple], new_interval: Optional[tuple] = None) -> List[dict]:
+    """Overlapping slots of different courses, with the exact overlap window
+
+    intervals are (day index, start minute, end minute, course code). Each
+    day's slots are swept in start order with a heap of the slots still
+    running, so the cost is O(n log n + k) for k conflicts. Slots that merely
+    touch (one ends when the next starts) do not conflict. When new_interval
+    is given, only the conflicts it would cause are returned.
+    """
+    by_day: Dict[int, list] = {}
+    for day_index, start, end, course_code in intervals:
+        by_day.setdefault(day_index, []).append((start, end, course_code, False))
+    if new_interval is not None:
+        day_index, start, end, course_code = new_interval
+        by_day.setdefault(day_index, []).append((start, end, course_code, True))
     
-    return total_minutes / 60.0
+    conflicts = []
+    for day_index in sorted(by_day):
+        intervals = by_day[day_index]
+        intervals.sort()
+        running = []
+        for start, end, course_code, is_new in intervals:
+            while running and running[0][0] <= start:
+                heapq.heappop(running)
+            for running_end, running_course, running_is_new in running:
+                if running_course == course_code or (new_interval is not None and not (is_new or running_is_new)):
+                    continue
+                conflicts.append({
+                    "course1": running_course,
+                    "course2": course_code,
+                    "day": DAY_NAMES[day_index],
+                    "start_time": format_clock_time(start),
+                    "end_time": format_clock_time(min(end, running_end))
+                })
+            heapq.heappush(running, (end, course_code, is_new))
+    
+    return conflicts
 
 async def read_uploaded_file(file: UploadFile) -> str:
     """Read and extract text from uploaded file"""
@@ -267,106 +1288,443 @@ async def read_uploaded_file(file: UploadFile) -> str:
     except Exception as e:
         return f"[Error reading file: {str(e)}]"
 
+# ============= ASSIGNMENT & SCHEDULE STORAGE =============
+
+ASSIGNMENT_UPDATABLE_FIELDS = ("title", "description", "status", "priority", "estimated_hours")
+# Columns returned by the API; due_day is internal
+ASSIGNMENT_COLUMNS = "id, user_id, title, description, course_code, due_date, priority, status, estimated_hours, created_at"
+
+class IdAllocator:
+    """Monotonic ids handed out from blocks reserved in the sequences table
+
+    Reserving a block is one short write transaction on its own connection,
+    so it commits even if the insert that needed the id rolls back, and no
+    two processes can ever hold the same block. Between reservations an id
+    costs one in-memory increment.
+    """
+
+    def __init__(self, name: str, block_size: int):
+        self.name = name
+        self.block_size = max(1, block_size)
+        self.lock = threading.Lock()
+        self.next_id = 0
+        self.limit = 0
+
+    def _reserve(self, count: int):
+        conn = sqlite3.connect(DATABASE_PATH, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "UPDATE sequences SET next_value = next_value + ? WHERE name = ? RETURNING next_value",
+                (count, self.name)
+            ).fetchone()
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        if row is None:
+            raise RuntimeError(f"Sequence {self.name!r} is missing; was init_database() run?")
+        self.limit = row[0]
+        self.next_id = self.limit - count
+
+    def allocate(self, count: int = 1) -> List[int]:
+        """The next count ids, in increasing order"""
+        with self.lock:
+            ids = []
+            while len(ids) < count:
+                if self.next_id >= self.limit:
+                    self._reserve(max(self.block_size, count - len(ids)))
+                take = min(count - len(ids), self.limit - self.next_id)
+                ids.extend(range(self.next_id, self.next_id + take))
+                self.next_id += take
+            return ids
+
+ASSIGNMENT_IDS = IdAllocator("assignments", ASSIGNMENT_ID_BLOCK_SIZE)
+
+def insert_assignments(assignments: List[dict], conn: sqlite3.Connection) -> List[dict]:
+    """Store new assignments on an open transaction and return them with their ids"""
+    ids = ASSIGNMENT_IDS.allocate(len(assignments))
+    stored = [{"id": assignment_id, **assignment} for assignment_id, assignment in zip(ids, assignments)]
+    conn.executemany(
+        """
+        INSERT INTO assignments (id, user_id, title, description, course_code, due_date, priority, status, estimated_hours, created_at, due_day)
+        VALUES (:id, :user_id, :title, :description, :course_code, :due_date, :priority, :status, :estimated_hours, :created_at, :due_day)
+        """,
+        [{**assignment, "due_day": parse_due_day(assignment["due_date"])} for assignment in stored]
+    )
+    return stored
+
+def insert_assignment(assignment: dict) -> dict:
+    """Store a new assignment and return it with its id"""
+    with get_db() as conn:
+        return insert_assignments([assignment], conn)[0]
+
+def find_assignment(assignment_id: int, user_id: str) -> Optional[dict]:
+    """A user's assignment by id, or None if it does not exist or belongs to someone else"""
+    row = get_db().execute(
+        f"SELECT {ASSIGNMENT_COLUMNS} FROM assignments WHERE id = ? AND user_id = ?", (assignment_id, user_id)
+    ).fetchone()
+    return dict(row) if row else None
+
+def find_assignments(assignment_ids: Sequence[int], user_id: str,
+                     conn: Optional[sqlite3.Connection] = None) -> Dict[int, dict]:
+    """A user's assignments among the given ids, keyed by id; other users' rows are left out"""
+    unique_ids = list(dict.fromkeys(assignment_ids))
+    if not unique_ids:
+        return {}
+    rows = (conn or get_db()).execute(
+        f"SELECT {ASSIGNMENT_COLUMNS} FROM assignments WHERE user_id = ? AND id IN ({', '.join('?' * len(unique_ids))})",
+        [user_id] + unique_ids
+    )
+    return {row["id"]: dict(row) for row in rows}
+
+def list_assignments(user_id: str, status_filter: Optional[str] = None,
+                     course_code: Optional[str] = None, priority: Optional[str] = None) -> List[dict]:
+    """A user's assignments in id order, narrowed by the optional filters"""
+    sql = f"SELECT {ASSIGNMENT_COLUMNS} FROM assignments WHERE user_id = ?"
+    params = [user_id]
+    for column, value in (("status", status_filter), ("course_code", course_code), ("priority", priority)):
+        if value:
+            sql += f" AND {column} = ?"
+            params.append(value)
+    sql += " ORDER BY id"
+    return [dict(row) for row in get_db().execute(sql, params)]
+
+def save_assignment_changes(assignment: dict, changes: dict, conn: Optional[sqlite3.Connection] = None):
+    """Write changed assignment fields"""
+    columns = [column for column in ASSIGNMENT_UPDATABLE_FIELDS if column in changes]
+    if not columns:
+        return
+    sql = f"UPDATE assignments SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?"
+    values = [changes[column] for column in columns] + [assignment["id"]]
+    if conn is not None:
+        conn.execute(sql, values)
+        return
+    with get_db() as conn:
+        conn.execute(sql, values)
+
+def assignment_stats(user_id: str, today: date) -> dict:
+    """Status counts and due-date buckets for one user
+
+    Status totals are one counter row. The due-date buckets are range counts
+    on the (user_id, due_day) indexes, so they only touch assignments that
+    fall in the bucket, never the user's whole history.
+    """
+    params = {
+        "user_id": user_id,
+        "today": today.isoformat(),
+        "week_end": (today + timedelta(days=7)).isoformat()
+    }
+    row = get_db().execute(
+        """
+        SELECT
+            COALESCE(c.total, 0) AS total,
+            COALESCE(c.pending, 0) AS pending,
+            COALESCE(c.in_progress, 0) AS in_progress,
+            COALESCE(c.completed, 0) AS completed,
+            (SELECT COUNT(*) FROM assignments
+             WHERE user_id = :user_id AND status != 'completed' AND due_day < :today) AS overdue,
+            (SELECT COUNT(*) FROM assignments
+             WHERE user_id = :user_id AND due_day = :today) AS due_today,
+            (SELECT COUNT(*) FROM assignments
+             WHERE user_id = :user_id AND due_day > :today AND due_day <= :week_end) AS due_this_week
+        FROM (SELECT :user_id AS user_id) u
+        LEFT JOIN assignment_counters c ON c.user_id = u.user_id
+        """,
+        params
+    ).fetchone()
+    return {key: row[key] for key in row.keys()}
+
+def delete_assignment_row(assignment_id: int):
+    with get_db() as conn:
+        conn.execute("DELETE FROM assignments WHERE id = ?", (assignment_id,))
+
+def delete_assignment_rows(assignment_ids: Sequence[int], user_id: str, conn: sqlite3.Connection) -> set:
+    """Delete a user's assignments among the given ids; returns the ids actually deleted"""
+    unique_ids = list(dict.fromkeys(assignment_ids))
+    if not unique_ids:
+        return set()
+    rows = conn.execute(
+        f"DELETE FROM assignments WHERE user_id = ? AND id IN ({', '.join('?' * len(unique_ids))}) RETURNING id",
+        [user_id] + unique_ids
+    )
+    return {row["id"] for row in rows}
+
+def load_schedule(user_id: str) -> List[dict]:
+    """A user's schedule: one entry per course with its time slots"""
+    rows = get_db().execute(
+        """
+        SELECT c.id AS course_id, c.course_code, c.course_title, c.color, c.is_personal,
+               s.day, s.start_time, s.end_time, s.location, s.type
+        FROM schedule_courses c
+        LEFT JOIN schedule_slots s ON s.schedule_course_id = c.id
+        WHERE c.user_id = ?
+        ORDER BY c.id, s.id
+        """,
+        (user_id,)
+    )
+    
+    schedule = []
+    current_id = None
+    for row in rows:
+        if row["course_id"] != current_id:
+            current_id = row["course_id"]
+            schedule.append({
+                "course_code": row["course_code"],
+                "course_title": row["course_title"],
+                "color": row["color"],
+                "time_slots": [],
+                "is_personal": bool(row["is_personal"])
+            })
+        if row["day"] is not None:
+            schedule[-1]["time_slots"].append({
+                "day": row["day"],
+                "start_time": row["start_time"],
+                "end_time": row["end_time"],
+                "location": row["location"],
+                "type": row["type"]
+            })
+    return schedule
+
+def find_schedule_course_id(conn: sqlite3.Connection, user_id: str, course_code: str) -> Optional[int]:
+    row = conn.execute(
+        "SELECT id FROM schedule_courses WHERE user_id = ? AND course_code = ?", (user_id, course_code)
+    ).fetchone()
+    return row["id"] if row else None
+
+def add_schedule_course(conn: sqlite3.Connection, user_id: str, course_code: str, course_title: str,
+                        color: str, is_personal: bool) -> int:
+    """Id of the user's schedule entry for a course, creating it if a concurrent request has not"""
+    row = conn.execute(
+        """
+        INSERT INTO schedule_courses (user_id, course_code, course_title, color, is_personal) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(user_id, course_code) DO UPDATE SET course_code = excluded.course_code
+        RETURNING id
+        """,
+        (user_id, course_code, course_title, color, int(is_personal))
+    ).fetchone()
+    return row["id"]
+
+def insert_schedule_slot(conn: sqlite3.Connection, schedule_course_id: int, slot: dict, times: Tuple[int, int, int]):
+    """Store a slot from parse_time_slot along with its pre-parsed times"""
+    day_index, start_minute, end_minute = times
+    conn.execute(
+        """
+        INSERT INTO schedule_slots (schedule_course_id, day, start_time, end_time, location, type, day_index, start_minute, end_minute)
+        VALUES (:schedule_course_id, :day, :start_time, :end_time, :location, :type, :day_index, :start_minute, :end_minute)
+        """,
+        {
+            "schedule_course_id": schedule_course_id, **slot,
+            "day_index": day_index, "start_minute": start_minute, "end_minute": end_minute
+        }
+    )
+
+def load_schedule_intervals(user_id: str, day_index: Optional[int] = None) -> List[tuple]:
+    """(day index, start minute, end minute, course code) for a user's slots, optionally one day only"""
+    sql = """
+        SELECT s.day_index, s.start_minute, s.end_minute, c.course_code
+        FROM schedule_courses c
+        JOIN schedule_slots s ON s.schedule_course_id = c.id
+        WHERE c.user_id = ? AND s.day_index IS NOT NULL
+    """
+    params = [user_id]
+    if day_index is not None:
+        sql += " AND s.day_index = ?"
+        params.append(day_index)
+    return [tuple(row) for row in get_db().execute(sql, params)]
+
+def schedule_weekly_minutes(user_id: str) -> int:
+    row = get_db().execute(
+        "SELECT COALESCE(SUM(weekly_minutes), 0) FROM schedule_courses WHERE user_id = ?", (user_id,)
+    ).fetchone()
+    return row[0]
+
+def delete_schedule_slot(conn: sqlite3.Connection, user_id: str, course_code: str, day: str, start_time: str):
+    """Remove a course's slots starting at the given day and time"""
+    course_id = find_schedule_course_id(conn, user_id, course_code)
+    if course_id is None:
+        return
+    day_index = DAY_INDEX.get(day.strip().lower())
+    start_minute = parse_clock_time(start_time)
+    if day_index is not None and start_minute is not None:
+        conn.execute(
+            "DELETE FROM schedule_slots WHERE schedule_course_id = ? AND day_index = ? AND start_minute = ?",
+            (course_id, day_index, start_minute)
+        )
+    else:
+        # Legacy slots that never parsed can only be matched by their text
+        conn.execute(
+            "DELETE FROM schedule_slots WHERE schedule_course_id = ? AND day = ? AND start_time = ?",
+            (course_id, day, start_time)
+        )
+
+def delete_schedule_course(user_id: str, course_code: str, conn: Optional[sqlite3.Connection] = None):
+    """Drop a course from a user's schedule; its slots go with it through the cascade"""
+    sql = "DELETE FROM schedule_courses WHERE user_id = ? AND course_code = ?"
+    if conn is not None:
+        conn.execute(sql, (user_id, course_code))
+        return
+    with get_db() as conn:
+        conn.execute(sql, (user_id, course_code))
+
 # ============= COURSE ENDPOINTS =============
 
 @app.get("/")
 def read_root():
-    """API health check"""
-    courses = load_courses_efficiently()
+    """API health check; never waits for the course catalog"""
+    catalog = COURSE_CATALOG
+    if catalog is None:
+        # Retries in the background if the startup warmup failed
+        start_catalog_warmup()
+        return {
+            "message": "StudyFlow API is running!",
+            "total_courses": 0,
+            "available_subjects": 0,
+            "status": "warming"
+        }
+    
     return {
         "message": "StudyFlow API is running!",
-        "total_courses": len(courses),
-        "available_subjects": len(SUBJECTS_CACHE) if SUBJECTS_CACHE else 0,
+        "total_courses": len(catalog),
+        "available_subjects": len(catalog.subjects),
+        "catalog_version": catalog.version,
         "status": "healthy"
     }
 
 @app.get("/courses/all")
-def get_all_courses(limit: int = 200):
-    """Get all courses with limit"""
-    courses = load_courses_efficiently()
+def get_all_courses(request: Request, limit: int = 200, after: Optional[str] = None, fields: Optional[str] = None):
+    """Get all courses with limit
+
+    Pass the returned `next_cursor` as `after` to get the next page, and a
+    comma-separated `fields` list (e.g. code,title,credits) to trim each course.
+    """
+    catalog = get_course_catalog()
+    
+    start = 0
+    if after:
+        start = catalog.resume(after)
+        if start is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid or expired cursor"
+            )
     
-    return {
-        "courses": courses[:limit],
-        "total_available": len(courses),
-        "limit": limit,
-        "message": f"Showing {min(limit, len(courses))} of {len(courses)} total courses"
-    }
+    field_names = None
+    if fields:
+        # Unknown names are dropped so they cannot multiply cache keys
+        field_names = {name.strip() for name in fields.split(",")} & catalog.fields
+    
+    def build():
+        page = catalog.page(start, limit, field_names)
+        end = start + len(page)
+        return {
+            "courses": page,
+            "total_available": len(catalog),
+            "limit": limit,
+            "next_cursor": catalog.cursor(end - 1) if page and end < len(catalog) else None,
+            "message": f"Showing {len(page)} of {len(catalog)} total courses"
+        }
+    
+    key = f"all:{limit}:{start}:{','.join(sorted(field_names or []))}"
+    # A filter matching no field would share the unfiltered key
+    cache = limit in CATALOG_CACHED_LIMITS and not after and field_names != set()
+    return catalog_response(request, catalog, key, build, cache=cache)
 
 @app.get("/courses/subjects")
-def get_all_subjects():
+def get_all_subjects(request: Request):
     """Get all available subjects"""
-    courses = load_courses_efficiently()
+    catalog = get_course_catalog()
     
-    if SUBJECTS_CACHE:
-        subjects = SUBJECTS_CACHE
-    else:
-        subjects = list(set(course.get('subject', '') for course in courses if course.get('subject')))
-        subjects.sort()
+    def build():
+        return {
+            "subjects": catalog.subjects,
+            "count": len(catalog.subjects)
+        }
     
-    return {
-        "subjects": subjects,
-        "count": len(subjects)
-    }
+    return catalog_response(request, catalog, "subjects", build)
 
 @app.get("/courses/subject/{subject_code}")
-def get_courses_by_subject(subject_code: str, limit: int = 50):
+def get_courses_by_subject(request: Request, subject_code: str, limit: int = 50):
     """Get courses by subject"""
-    courses = load_courses_efficiently()
+    catalog = get_course_catalog()
+    subject = subject_code.upper()
     
-    subject_courses = [
-        course for course in courses 
-        if course.get('subject', '').upper() == subject_code.upper()
-    ]
+    def build():
+        return {
+            "subject": subject,
+            "courses": catalog.courses_for_subject(subject, limit),
+            "total_available": len(catalog.subject_indexes(subject)),
+            "limit": limit
+        }
     
-    return {
-        "subject": subject_code.upper(),
-        "courses": subject_courses[:limit],
-        "total_available": len(subject_courses),
-        "limit": limit
-    }
+    # Only real subjects are cached so arbitrary paths cannot grow the cache
+    cache = limit in CATALOG_CACHED_LIMITS and bool(catalog.subject_indexes(subject))
+    return catalog_response(request, catalog, f"subject:{subject}:{limit}", build, cache=cache)
+
+@app.get("/courses/export")
+def export_courses(subject: Optional[str] = None):
+    """Stream the whole catalog (or one subject) as newline-delimited JSON"""
+    catalog = get_course_catalog()
+    indexes = catalog.subject_indexes(subject) if subject else range(len(catalog))
+    
+    def generate():
+        # One course is decoded at a time, sent in small batches
+        lines = []
+        for index in indexes:
+            lines.append(json.dumps(catalog.project(index), ensure_ascii=False, separators=(",", ":")))
+            if len(lines) >= EXPORT_CHUNK_SIZE:
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+                lines = []
+        if lines:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+    
+    headers = {"X-Catalog-Version": catalog.version, "X-Total-Count": str(len(indexes))}
+    return StreamingResponse(generate(), media_type="application/x-ndjson", headers=headers)
 
 @app.get("/courses/search")
 def search_courses(q: Optional[str] = None, subject: Optional[str] = None, limit: int = 50):
-    """Search through courses"""
-    courses = load_courses_efficiently()
-    filtered_courses = courses
-    
-    if subject:
-        filtered_courses = [
-            course for course in filtered_courses 
-            if course.get('subject', '').upper() == subject.upper()
-        ]
-    
-    if q:
-        search_term = q.lower()
-        filtered_courses = [
-            course for course in filtered_courses
-            if (search_term in course.get('title', '').lower() or 
-                search_term in course.get('code', '').lower() or
-                search_term in course.get('description', '').lower())
-        ]
-    
-    result_courses = filtered_courses[:limit]
+    """Search through courses, best matches first"""
+    result_courses, total_matches = get_course_catalog().search(q, subject, limit)
     
     return {
         "query": q,
         "subject_filter": subject,
         "courses": result_courses,
         "count": len(result_courses),
-        "total_matches": len(filtered_courses)
+        "total_matches": total_matches
+    }
+
+@app.get("/courses/suggest")
+def suggest_courses(q: str, limit: int = 10):
+    """Lightweight autocomplete over course codes and titles"""
+    limit = min(limit, SUGGEST_MAX_LIMIT)
+    suggestions = get_course_catalog().suggest(q, limit)
+    
+    return {
+        "query": q,
+        "suggestions": [{"code": code, "title": title} for code, title in suggestions],
+        "count": len(suggestions)
     }
 
 # ============= AUTHENTICATION ENDPOINTS =============
 
+def user_response(user: dict) -> dict:
+    return {
+        "id": user["id"],
+        "email": user["email"],
+        "full_name": user["full_name"],
+        "student_id": user.get("student_id"),
+        "created_at": user["created_at"],
+        "enrolled_courses": user.get("enrolled_courses", [])
+    }
+
 @app.post("/auth/register")
-def register(user_data: UserCreate):
+async def register(user_data: UserCreate):
     """Register a new user"""
-    for user_id, user in USERS_DATABASE.items():
-        if user["email"] == user_data.email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
+    if await run_in_threadpool(find_user_by_email, user_data.email):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
     if not user_data.email.endswith("@uottawa.ca"):
         raise HTTPException(
@@ -381,7 +1739,7 @@ def register(user_data: UserCreate):
         )
     
     user_id = str(uuid.uuid4())
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     
     new_user = {
         "id": user_id,
@@ -393,71 +1751,93 @@ def register(user_data: UserCreate):
         "enrolled_courses": []
     }
     
-    USERS_DATABASE[user_id] = new_user
-    save_users_to_file()
+    try:
+        await run_in_threadpool(save_user, new_user)
+    except sqlite3.IntegrityError:
+        # Registered concurrently, possibly through another worker
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
     access_token = create_access_token(data={"sub": user_id})
+    refresh_token = await run_in_threadpool(issue_refresh_token, user_id)
     
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": {
-            "id": user_id,
-            "email": user_data.email,
-            "full_name": user_data.full_name,
-            "student_id": user_data.student_id,
-            "created_at": new_user["created_at"],
-            "enrolled_courses": []
-        }
+        "refresh_token": refresh_token,
+        "user": user_response(new_user)
     }
 
 @app.post("/auth/login")
-def login(user_data: UserLogin):
+async def login(user_data: UserLogin):
     """Login user"""
-    user = None
-    user_id = None
-    for uid, u in USERS_DATABASE.items():
-        if u["email"] == user_data.email:
-            user = u
-            user_id = uid
-            break
-    
-    if not user or not verify_password(user_data.password, user["password_hash"]):
+    user = await run_in_threadpool(find_user_by_email, user_data.email)
+    
+    if user:
+        password_ok, upgraded_hash = await verify_password_async(user_data.password, user["password_hash"])
+    else:
+        password_ok, upgraded_hash = False, None
+    
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
     
+    if upgraded_hash:
+        await run_in_threadpool(save_password_hash, user["id"], upgraded_hash)
+    
+    user_id = user["id"]
     access_token = create_access_token(data={"sub": user_id})
+    refresh_token = await run_in_threadpool(issue_refresh_token, user_id)
     
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": {
-            "id": user_id,
-            "email": user["email"],
-            "full_name": user["full_name"],
-            "student_id": user.get("student_id"),
-            "created_at": user["created_at"],
-            "enrolled_courses": user.get("enrolled_courses", [])
-        }
+        "refresh_token": refresh_token,
+        "user": user_response(user)
+    }
+
+@app.post("/auth/refresh")
+def refresh_access_token(request: RefreshRequest):
+    """Trade a refresh token for a new access token and a new refresh token, without a password"""
+    rotated = rotate_refresh_token(request.refresh_token)
+    user = get_user(rotated[0]) if rotated else None
+    
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token"
+        )
+    
+    return {
+        "access_token": create_access_token(data={"sub": user["id"]}),
+        "token_type": "bearer",
+        "refresh_token": rotated[1],
+        "user": user_response(user)
     }
 
 @app.get("/auth/me")
 def get_current_user(user: dict = Depends(verify_token)):
     """Get current authenticated user"""
-    return {
-        "id": user["id"],
-        "email": user["email"],
-        "full_name": user["full_name"],
-        "student_id": user.get("student_id"),
-        "created_at": user["created_at"],
-        "enrolled_courses": user.get("enrolled_courses", [])
-    }
+    return user_response(user)
 
 @app.post("/auth/logout")
-def logout(user: dict = Depends(verify_token)):
-    """Logout user"""
+def logout(
+    request: Optional[RefreshRequest] = None,
+    everywhere: bool = False,
+    user: dict = Depends(verify_token),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Logout user; everywhere=true also ends the user's sessions on other devices"""
+    token = credentials.credentials
+    revoke_token(token, decode_token(token)["exp"])
+    if everywhere:
+        revoke_user_refresh_tokens(user["id"])
+    elif request is not None:
+        revoke_refresh_token(request.refresh_token, user["id"])
     return {"message": "Successfully logged out"}
 
 # ============= ENROLLMENT ENDPOINTS =============
@@ -465,8 +1845,7 @@ def logout(user: dict = Depends(verify_token)):
 @app.post("/user/enroll/{course_code}")
 def enroll_in_course(course_code: str, user: dict = Depends(verify_token)):
     """Enroll user in a course"""
-    courses = load_courses_efficiently()
-    course = next((c for c in courses if c.get("code") == course_code), None)
+    course = get_course_catalog().get(course_code)
     
     if not course:
         raise HTTPException(
@@ -474,58 +1853,45 @@ def enroll_in_course(course_code: str, user: dict = Depends(verify_token)):
             detail=f"Course {course_code} not found"
         )
     
-    if course_code in user.get("enrolled_courses", []):
+    with get_db() as conn:
+        enrolled = add_enrollment(user["id"], course_code, conn)
+        enrolled_courses = enrolled_course_codes(user["id"], conn)
+    
+    if not enrolled:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Already enrolled in this course"
         )
     
-    if "enrolled_courses" not in user:
-        user["enrolled_courses"] = []
-    
-    user["enrolled_courses"].append(course_code)
-    save_users_to_file()
-    
     return {
         "message": f"Successfully enrolled in {course_code}",
         "course_code": course_code,
-        "enrolled_courses": user["enrolled_courses"]
+        "enrolled_courses": enrolled_courses
     }
 
 @app.delete("/user/unenroll/{course_code}")
 def unenroll_from_course(course_code: str, user: dict = Depends(verify_token)):
     """Unenroll user from a course"""
-    if course_code not in user.get("enrolled_courses", []):
+    with get_db() as conn:
+        unenrolled = remove_enrollment(user["id"], course_code, conn)
+        if unenrolled:
+            delete_schedule_course(user["id"], course_code, conn)
+        enrolled_courses = enrolled_course_codes(user["id"], conn)
+    
+    if not unenrolled:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Not enrolled in this course"
         )
     
-    user["enrolled_courses"].remove(course_code)
-    
-    if user["id"] in SCHEDULE_DATABASE:
-        SCHEDULE_DATABASE[user["id"]] = [
-            s for s in SCHEDULE_DATABASE[user["id"]] 
-            if s.get("course_code") != course_code
-        ]
-    
-    save_users_to_file()
-    
     return {
         "message": f"Successfully unenrolled from {course_code}",
-        "enrolled_courses": user["enrolled_courses"]
+        "enrolled_courses": enrolled_courses
     }
 
-@app.get("/user/courses")
-def get_user_courses(user: dict = Depends(verify_token)):
-    """Get user's enrolled courses"""
-    courses = load_courses_efficiently()
+def enrolled_courses_response(user: dict) -> dict:
     enrolled_course_codes = user.get("enrolled_courses", [])
-    
-    enrolled_courses = []
-    for course in courses:
-        if course.get("code") in enrolled_course_codes:
-            enrolled_courses.append(course)
+    enrolled_courses = get_course_catalog().courses_for_codes(enrolled_course_codes)
     
     return {
         "user_id": user["id"],
@@ -533,21 +1899,16 @@ def get_user_courses(user: dict = Depends(verify_token)):
         "count": len(enrolled_courses)
     }
 
+@app.get("/user/courses")
+def get_user_courses(user: dict = Depends(verify_token)):
+    """Get user's enrolled courses"""
+    return enrolled_courses_response(user)
+
 # ============= ASSIGNMENT ENDPOINTS =============
 
-@app.post("/assignments")
-def create_assignment(assignment: AssignmentCreate, user: dict = Depends(verify_token)):
-    """Create a new assignment"""
-    if assignment.course_code not in user.get("enrolled_courses", []):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You are not enrolled in this course"
-        )
-    
-    assignment_id = len(ASSIGNMENTS_DATABASE) + 1
-    
-    new_assignment = {
-        "id": assignment_id,
+def new_assignment_record(assignment: AssignmentCreate, user: dict) -> dict:
+    """Row values for a new pending assignment"""
+    return {
         "user_id": user["id"],
         "title": assignment.title,
         "description": assignment.description or "",
@@ -558,10 +1919,43 @@ def create_assignment(assignment: AssignmentCreate, user: dict = Depends(verify_
         "estimated_hours": assignment.estimated_hours,
         "created_at": datetime.utcnow().isoformat()
     }
+
+def assignment_changes(update_data: AssignmentUpdate) -> dict:
+    """Fields an update actually sets; empty strings leave the old value"""
+    changes = {}
+    if update_data.title:
+        changes["title"] = update_data.title
+    if update_data.description:
+        changes["description"] = update_data.description
+    if update_data.status:
+        changes["status"] = update_data.status
+    if update_data.priority:
+        changes["priority"] = update_data.priority
+    if update_data.estimated_hours is not None:
+        changes["estimated_hours"] = update_data.estimated_hours
+    return changes
+
+def check_batch_size(items: list):
+    if len(items) > ASSIGNMENT_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can contain at most {ASSIGNMENT_BATCH_MAX_SIZE} items"
+        )
+
+def batch_response(results: List[dict]) -> dict:
+    succeeded = sum(1 for result in results if result["status"] < 400)
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+@app.post("/assignments")
+def create_assignment(assignment: AssignmentCreate, user: dict = Depends(verify_token)):
+    """Create a new assignment"""
+    if assignment.course_code not in user.get("enrolled_courses", []):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You are not enrolled in this course"
+        )
     
-    ASSIGNMENTS_DATABASE[assignment_id] = new_assignment
-    
-    return new_assignment
+    return insert_assignment(new_assignment_record(assignment, user))
 
 @app.get("/assignments")
 def get_assignments(
@@ -571,23 +1965,89 @@ def get_assignments(
     priority: Optional[str] = None
 ):
     """Get user's assignments with optional filtering"""
-    assignments = [a for a in ASSIGNMENTS_DATABASE.values() if a["user_id"] == user["id"]]
-    
-    if status_filter:
-        assignments = [a for a in assignments if a["status"] == status_filter]
-    if course_code:
-        assignments = [a for a in assignments if a["course_code"] == course_code]
-    if priority:
-        assignments = [a for a in assignments if a["priority"] == priority]
+    return list_assignments(user["id"], status_filter, course_code, priority)
+
+# Batch routes are registered before /assignments/{assignment_id} so "batch" is not read as an id.
+# Each one authenticates once and applies every valid item in a single transaction;
+# items that fail their checks are reported in place and do not affect the others.
+
+@app.post("/assignments/batch")
+def create_assignments_batch(items: List[Any], user: dict = Depends(verify_token)):
+    """Create many assignments at once"""
+    check_batch_size(items)
+    enrolled = set(user.get("enrolled_courses", []))
+    
+    # Items are validated one by one so a malformed item fails alone
+    results = [None] * len(items)
+    assignments = [None] * len(items)
+    accepted = []
+    for index, item in enumerate(items):
+        try:
+            assignment = assignments[index] = AssignmentCreate.model_validate(item)
+        except ValidationError as e:
+            results[index] = {
+                "index": index,
+                "status": status.HTTP_422_UNPROCESSABLE_ENTITY,
+                "detail": e.errors(include_url=False, include_context=False)
+            }
+            continue
+        if assignment.course_code not in enrolled:
+            results[index] = {"index": index, "status": status.HTTP_400_BAD_REQUEST, "detail": "You are not enrolled in this course"}
+        else:
+            accepted.append(index)
+    
+    with get_db() as conn:
+        stored = insert_assignments([new_assignment_record(assignments[index], user) for index in accepted], conn)
+    for index, assignment in zip(accepted, stored):
+        results[index] = {"index": index, "status": status.HTTP_201_CREATED, "assignment": assignment}
+    
+    return batch_response(results)
+
+@app.patch("/assignments/batch")
+def update_assignments_batch(updates: List[AssignmentBatchUpdate], user: dict = Depends(verify_token)):
+    """Update many assignments at once"""
+    check_batch_size(updates)
+    
+    results = []
+    with get_db() as conn:
+        existing = find_assignments([update.id for update in updates], user["id"], conn)
+        for index, update in enumerate(updates):
+            assignment = existing.get(update.id)
+            if not assignment:
+                results.append({"index": index, "id": update.id, "status": status.HTTP_404_NOT_FOUND, "detail": "Assignment not found"})
+                continue
+            changes = assignment_changes(update)
+            save_assignment_changes(assignment, changes, conn)
+            assignment.update(changes)
+            results.append({"index": index, "id": update.id, "status": status.HTTP_200_OK, "assignment": dict(assignment)})
+    
+    return batch_response(results)
+
+@app.delete("/assignments/batch")
+def delete_assignments_batch(assignment_ids: List[int], user: dict = Depends(verify_token)):
+    """Delete many assignments at once"""
+    check_batch_size(assignment_ids)
+    
+    with get_db() as conn:
+        deleted = delete_assignment_rows(assignment_ids, user["id"], conn)
+    
+    results = []
+    for index, assignment_id in enumerate(assignment_ids):
+        if assignment_id in deleted:
+            # A repeated id only counts as deleted once
+            deleted.discard(assignment_id)
+            results.append({"index": index, "id": assignment_id, "status": status.HTTP_200_OK})
+        else:
+            results.append({"index": index, "id": assignment_id, "status": status.HTTP_404_NOT_FOUND, "detail": "Assignment not found"})
     
-    return assignments
+    return batch_response(results)
 
 @app.get("/assignments/{assignment_id}")
 def get_assignment(assignment_id: int, user: dict = Depends(verify_token)):
     """Get specific assignment"""
-    assignment = ASSIGNMENTS_DATABASE.get(assignment_id)
+    assignment = find_assignment(assignment_id, user["id"])
     
-    if not assignment or assignment["user_id"] != user["id"]:
+    if not assignment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Assignment not found"
@@ -602,74 +2062,39 @@ def update_assignment(
     user: dict = Depends(verify_token)
 ):
     """Update assignment"""
-    assignment = ASSIGNMENTS_DATABASE.get(assignment_id)
+    assignment = find_assignment(assignment_id, user["id"])
     
-    if not assignment or assignment["user_id"] != user["id"]:
+    if not assignment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Assignment not found"
         )
     
-    if update_data.title:
-        assignment["title"] = update_data.title
-    if update_data.description:
-        assignment["description"] = update_data.description
-    if update_data.status:
-        assignment["status"] = update_data.status
-    if update_data.priority:
-        assignment["priority"] = update_data.priority
-    if update_data.estimated_hours is not None:
-        assignment["estimated_hours"] = update_data.estimated_hours
+    changes = assignment_changes(update_data)
+    save_assignment_changes(assignment, changes)
+    assignment.update(changes)
     
     return assignment
 
 @app.delete("/assignments/{assignment_id}")
 def delete_assignment(assignment_id: int, user: dict = Depends(verify_token)):
     """Delete assignment"""
-    assignment = ASSIGNMENTS_DATABASE.get(assignment_id)
+    assignment = find_assignment(assignment_id, user["id"])
     
-    if not assignment or assignment["user_id"] != user["id"]:
+    if not assignment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Assignment not found"
         )
     
-    del ASSIGNMENTS_DATABASE[assignment_id]
+    delete_assignment_row(assignment_id)
     
     return {"message": "Assignment deleted"}
 
 @app.get("/assignments/summary/stats")
 def get_assignment_stats(user: dict = Depends(verify_token)):
     """Get assignment statistics"""
-    user_assignments = [a for a in ASSIGNMENTS_DATABASE.values() if a["user_id"] == user["id"]]
-    
-    stats = {
-        "total": len(user_assignments),
-        "pending": len([a for a in user_assignments if a["status"] == "pending"]),
-        "in_progress": len([a for a in user_assignments if a["status"] == "in_progress"]),
-        "completed": len([a for a in user_assignments if a["status"] == "completed"]),
-        "overdue": 0,
-        "due_today": 0,
-        "due_this_week": 0
-    }
-    
-    today = date.today()
-    week_end = today + timedelta(days=7)
-    
-    for assignment in user_assignments:
-        try:
-            due_date = datetime.fromisoformat(assignment["due_date"]).date()
-            
-            if due_date < today and assignment["status"] != "completed":
-                stats["overdue"] += 1
-            elif due_date == today:
-                stats["due_today"] += 1
-            elif today <= due_date <= week_end:
-                stats["due_this_week"] += 1
-        except:
-            pass
-    
-    return stats
+    return assignment_stats(user["id"], date.today())
 
 # ============= SCHEDULE ENDPOINTS =============
 
@@ -695,45 +2120,39 @@ def add_manual_schedule(
             detail="You are not enrolled in this course"
         )
     
-    if user_id not in SCHEDULE_DATABASE:
-        SCHEDULE_DATABASE[user_id] = []
-    
-    # Find or create course schedule
-    course_schedule = next(
-        (s for s in SCHEDULE_DATABASE[user_id] if s.get("course_code") == course_code),
-        None
-    )
-    
-    if not course_schedule:
-        # Generate a color for personal events
-        colors = ["blue", "purple", "green", "red", "yellow", "pink", "orange"]
-        color = colors[len(SCHEDULE_DATABASE[user_id]) % len(colors)]
-        
-        course_schedule = {
-            "course_code": course_code,
-            "course_title": course_title,
-            "color": color,
-            "time_slots": [],
-            "is_personal": is_personal
-        }
-        SCHEDULE_DATABASE[user_id].append(course_schedule)
-    
     # Add time slot
-    time_slot = {
+    time_slot, times = parse_time_slot({
         "day": day,
         "start_time": start_time,
         "end_time": end_time,
         "location": location,
         "type": session_type
-    }
+    })
     
-    course_schedule["time_slots"].append(time_slot)
+    with get_db() as conn:
+        conflicts = find_schedule_conflicts(load_schedule_intervals(user_id, times[0]), (*times, course_code))
+        
+        # Find or create course schedule
+        schedule_course_id = find_schedule_course_id(conn, user_id, course_code)
+        
+        if schedule_course_id is None:
+            # Generate a color for personal events
+            colors = ["blue", "purple", "green", "red", "yellow", "pink", "orange"]
+            course_count = conn.execute(
+                "SELECT COUNT(*) FROM schedule_courses WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+            color = colors[course_count % len(colors)]
+            
+            schedule_course_id = add_schedule_course(conn, user_id, course_code, course_title, color, is_personal)
+        
+        insert_schedule_slot(conn, schedule_course_id, time_slot, times)
     
     return {
         "message": "Successfully added to schedule",
         "course_code": course_code,
         "course_title": course_title,
-        "time_slot": time_slot
+        "time_slot": time_slot,
+        "conflicts": conflicts
     }
 
 @app.post("/schedule/{course_code}/slot")
@@ -750,27 +2169,21 @@ def add_schedule_slot(
         )
     
     user_id = user["id"]
-    if user_id not in SCHEDULE_DATABASE:
-        SCHEDULE_DATABASE[user_id] = []
-    
-    course_schedule = next(
-        (s for s in SCHEDULE_DATABASE[user_id] if s.get("course_code") == course_code),
-        None
-    )
-    
-    if not course_schedule:
-        course_schedule = {
-            "course_code": course_code,
-            "course_title": f"Course {course_code}",
-            "color": "blue",
-            "time_slots": [],
-            "is_personal": False
-        }
-        SCHEDULE_DATABASE[user_id].append(course_schedule)
+    time_slot, times = parse_time_slot(slot.dict())
     
-    course_schedule["time_slots"].append(slot.dict())
+    with get_db() as conn:
+        conflicts = find_schedule_conflicts(load_schedule_intervals(user_id, times[0]), (*times, course_code))
+        
+        schedule_course_id = find_schedule_course_id(conn, user_id, course_code)
+        
+        if schedule_course_id is None:
+            schedule_course_id = add_schedule_course(
+                conn, user_id, course_code, f"Course {course_code}", "blue", False
+            )
+        
+        insert_schedule_slot(conn, schedule_course_id, time_slot, times)
     
-    return {"message": "Time slot added", "course_code": course_code}
+    return {"message": "Time slot added", "course_code": course_code, "conflicts": conflicts}
 
 @app.delete("/schedule/{course_code}/slot")
 def remove_schedule_slot(
@@ -782,60 +2195,61 @@ def remove_schedule_slot(
     """Remove a time slot from schedule"""
     user_id = user["id"]
     
-    if user_id in SCHEDULE_DATABASE:
-        for course_schedule in SCHEDULE_DATABASE[user_id]:
-            if course_schedule.get("course_code") == course_code:
-                course_schedule["time_slots"] = [
-                    s for s in course_schedule["time_slots"]
-                    if not (s.get("day") == day and s.get("start_time") == start_time)
-                ]
+    with get_db() as conn:
+        delete_schedule_slot(conn, user_id, course_code, day, start_time)
     
     return {"message": "Time slot removed"}
 
-@app.get("/schedule")
-def get_schedule(user: dict = Depends(verify_token)):
-    """Get user's schedule"""
-    user_id = user["id"]
-    schedule = SCHEDULE_DATABASE.get(user_id, [])
-    
-    total_hours = 0.0
-    for course in schedule:
-        total_hours += calculate_weekly_hours(course.get("time_slots", []))
+def schedule_response(user_id: str) -> dict:
+    schedule = load_schedule(user_id)
     
     return {
         "schedule": schedule,
         "total_courses": len(schedule),
-        "total_hours_per_week": total_hours
+        "total_hours_per_week": schedule_weekly_minutes(user_id) / 60.0
     }
 
+@app.get("/schedule")
+def get_schedule(user: dict = Depends(verify_token)):
+    """Get user's schedule"""
+    return schedule_response(user["id"])
+
 @app.get("/schedule/conflicts")
 def check_schedule_conflicts(user: dict = Depends(verify_token)):
     """Check for schedule conflicts"""
+    return {"conflicts": find_schedule_conflicts(load_schedule_intervals(user["id"]))}
+
+# ============= DASHBOARD ENDPOINT =============
+
+@app.get("/dashboard")
+def get_dashboard(user: dict = Depends(verify_token)):
+    """Everything the dashboard shows, in one request
+
+    Each section has the same shape as its own endpoint (/auth/me, /user/courses,
+    /assignments, /assignments/summary/stats, /schedule). The token is verified
+    once, and the storage reads share one SQLite read transaction, so the
+    sections all describe the same moment.
+    """
     user_id = user["id"]
-    schedule = SCHEDULE_DATABASE.get(user_id, [])
-    conflicts = []
     
-    for i, course1 in enumerate(schedule):
-        for course2 in schedule[i+1:]:
-            for slot1 in course1.get("time_slots", []):
-                for slot2 in course2.get("time_slots", []):
-                    if slot1.get("day") == slot2.get("day"):
-                        try:
-                            start1 = int(slot1.get("start_time", "0:0").split(":")[0])
-                            end1 = int(slot1.get("end_time", "0:0").split(":")[0])
-                            start2 = int(slot2.get("start_time", "0:0").split(":")[0])
-                            end2 = int(slot2.get("end_time", "0:0").split(":")[0])
-                            
-                            if start1 < end2 and start2 < end1:
-                                conflicts.append({
-                                    "course1": course1.get("course_code"),
-                                    "course2": course2.get("course_code"),
-                                    "day": slot1.get("day")
-                                })
-                        except:
-                            pass
-    
-    return {"conflicts": conflicts}
+    conn = get_db()
+    conn.execute("BEGIN")
+    try:
+        user = {**user, "enrolled_courses": enrolled_course_codes(user_id, conn)}
+        courses = enrolled_courses_response(user)
+        assignments = list_assignments(user_id)
+        stats = assignment_stats(user_id, date.today())
+        schedule = schedule_response(user_id)
+    finally:
+        conn.commit()
+    
+    return {
+        "user": user_response(user),
+        "courses": courses,
+        "assignments": assignments,
+        "stats": stats,
+        "schedule": schedule
+    }
 
 # ============= AI ENDPOINTS =============
 
@@ -865,7 +2279,7 @@ async def chat_with_ai(
         if claude_available and claude_client:
             ai_response = await call_claude_api(full_prompt)
         else:
-            ai_response = generate_smart_response(full_prompt, file is not None)
+            ai_response = await run_in_threadpool(generate_smart_response, full_prompt, file is not None)
         
         return {
             "response": ai_response,
@@ -887,9 +2301,10 @@ async def call_claude_api(prompt: str) -> str:
     """Call Claude API for intelligent responses"""
     try:
         if not claude_client:
-            return generate_smart_response(prompt)
+            return await run_in_threadpool(generate_smart_response, prompt)
         
-        courses = load_courses_efficiently()
+        # The first call may have to wait for the catalog to load; do that off the event loop
+        courses = await run_in_threadpool(get_course_catalog)
         course_context = get_relevant_course_context(prompt, courses)
         
         system_prompt = f"""You are an intelligent AI Study Assistant for University of Ottawa students. You help with:
@@ -908,21 +2323,24 @@ University Context:
 
 Be conversational, encouraging, and provide detailed explanations with examples when helpful."""
 
-        response = claude_client.messages.create(
-            model="claude-3-5-haiku-20241022",
-            max_tokens=1000,
-            temperature=0.7,
-            system=system_prompt,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        async with CLAUDE_SEMAPHORE:
+            response = await create_claude_message(
+                claude_client,
+                max_tokens=1000,
+                system=system_prompt,
+                messages=[{"role": "user", "content": prompt}]
+            )
         
+        record_claude_status(True)
         return response.content[0].text
         
     except Exception as e:
         print(f"❌ Claude API error: {str(e)}")
-        return generate_smart_response(prompt)
+        if claude_client:
+            record_claude_status(False)
+        return await run_in_threadpool(generate_smart_response, prompt)
 
-def get_relevant_course_context(message: str, courses: list) -> str:
+def get_relevant_course_context(message: str, courses: CourseCatalog) -> str:
     """Get relevant course information based on the user's message"""
     message_lower = message.lower()
     context_parts = []
@@ -932,7 +2350,7 @@ def get_relevant_course_context(message: str, courses: list) -> str:
     
     for subject, full_name in subjects.items():
         if subject in message_lower:
-            subject_courses = [c for c in courses if c.get('subject') == subject.upper()][:3]
+            subject_courses = courses.courses_for_subject(subject, 3)
             if subject_courses:
                 context_parts.append(f"{full_name} courses: " + 
                                    ", ".join(f"{c.get('code')}" for c in subject_courses))
@@ -945,14 +2363,14 @@ def generate_smart_response(prompt: str, has_file: bool = False) -> str:
     """Generate smart fallback responses based on keywords"""
     prompt_lower = prompt.lower()
     
-    courses = load_courses_efficiently()
+    courses = get_course_catalog()
     course_context = ""
     
     if any(subject in prompt_lower for subject in ["csi", "mat", "seg", "ceg", "phy", "chm", "eco", "eng"]):
-        subject_matches = [s for s in SUBJECTS_CACHE or [] if s.lower() in prompt_lower]
+        subject_matches = [s for s in courses.subjects if s.lower() in prompt_lower]
         if subject_matches:
             subject = subject_matches[0]
-            subject_courses = [c for c in courses if c.get('subject') == subject][:3]
+            subject_courses = courses.courses_for_subject(subject, 3)
             if subject_courses:
                 course_context = f"\n\nRelated {subject} Courses at uOttawa:\n"
                 for course in subject_courses:
@@ -1161,24 +2579,29 @@ What would you like help with today?{course_context}"""
 
 @app.get("/ai/status")
 async def ai_status():
-    """Check AI service status"""
-    courses = load_courses_efficiently()
+    """Check AI service status; never waits for the course catalog or queued chats
+
+    Chats record their outcome too, so the status follows what chats actually get.
+    """
+    catalog = COURSE_CATALOG
+    courses = catalog.courses if catalog is not None else []
     
     actual_service = "Enhanced Fallback"
     model_info = "Pattern-based responses"
     
     if claude_client:
-        try:
-            test_response = claude_client.messages.create(
-                model="claude-3-5-haiku-20241022",
-                max_tokens=50,
-                messages=[{"role": "user", "content": "Hello"}]
-            )
-            actual_service = "Claude API"
-            model_info = "claude-3-5-haiku-20241022"
-        except:
-            actual_service = "Enhanced Fallback (Claude Failed)"
-            model_info = "Claude API key present but not working"
+        if CLAUDE_STATUS is None or time.time() - CLAUDE_STATUS[0] > CLAUDE_STATUS_TTL_SECONDS:
+            # Bypasses the chat semaphore and gives up quickly, so a busy worker still answers
+            try:
+                await create_claude_message(
+                    claude_client.with_options(timeout=CLAUDE_STATUS_PROBE_TIMEOUT_SECONDS, max_retries=0),
+                    max_tokens=50,
+                    messages=[{"role": "user", "content": "Hello"}]
+                )
+                record_claude_status(True)
+            except Exception:
+                record_claude_status(False)
+        _, actual_service, model_info = CLAUDE_STATUS
     
     return {
         "status": "online",
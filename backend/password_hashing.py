@@ -0,0 +1,35 @@
+# Password Hashing - bcrypt work that runs in a separate worker process
+# Kept apart from main.py so a worker only needs bcrypt. Under `uvicorn main:app` that is all it
+# imports; under `python main.py`, spawn also re-imports main.py, which does no startup work at import.
+from typing import Optional, Tuple
+
+import bcrypt
+
+
+def hash_cost(hashed: str) -> Optional[int]:
+    """Cost factor of a bcrypt hash ("$2b$12$..." -> 12), or None if it cannot be read"""
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def hash_password(password: str, rounds: int) -> str:
+    """Hash password using bcrypt"""
+    salt = bcrypt.gensalt(rounds=rounds)
+    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+    return hashed.decode('utf-8')
+
+
+def check_password(password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    """Verify password against hash
+
+    Returns (matches, new_hash). new_hash is set when the password matched
+    but the stored hash used a different cost factor, so the caller can
+    store it without a second trip to the worker.
+    """
+    if not bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8')):
+        return False, None
+    if hash_cost(hashed) != rounds:
+        return True, hash_password(password, rounds)
+    return True, None
@@ -111,6 +111,7 @@ export default function AuthPage() {
 
       if (response.ok) {
         localStorage.setItem("auth_token", data.access_token);
+        localStorage.setItem("refresh_token", data.refresh_token);
         localStorage.setItem("auth_user", JSON.stringify(data.user));
 
         setMessage({
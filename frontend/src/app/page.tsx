@@ -35,6 +35,7 @@ import {
   Square,
   MapPin,
 } from "lucide-react";
+import { authFetch } from "./utils/api";
 
 // Define interfaces
 interface Course {
@@ -159,6 +160,7 @@ export default function Dashboard() {
   const [authChecked, setAuthChecked] = useState(false);
 
   const [enrolledCourses, setEnrolledCourses] = useState<Course[]>([]);
+  const [stats, setStats] = useState<any>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [currentPage, setCurrentPage] = useState("dashboard");
@@ -193,18 +195,19 @@ export default function Dashboard() {
   useEffect(() => {
     if (!user || !token) return;
 
-    const loadEnrolledCourses = async () => {
+    const loadDashboard = async () => {
       try {
-        const response = await fetch("http://localhost:8000/user/courses", {
+        // Enrolled courses and assignment stats come back in one request
+        const response = await authFetch("/dashboard", {
           headers: {
-            Authorization: `Bearer ${token}`,
             "Content-Type": "application/json",
           },
         });
 
         if (response.ok) {
           const data = await response.json();
-          setEnrolledCourses(data.enrolled_courses || []);
+          setEnrolledCourses(data.courses.enrolled_courses || []);
+          setStats(data.stats);
           setLoading(false);
           return;
         } else if (response.status === 401) {
@@ -224,7 +227,7 @@ export default function Dashboard() {
       setLoading(false);
     };
 
-    loadEnrolledCourses();
+    loadDashboard();
   }, [user, token]);
 
   useEffect(() => {
@@ -236,18 +239,22 @@ export default function Dashboard() {
   const handleLogout = async () => {
     try {
       if (token) {
-        await fetch("http://localhost:8000/auth/logout", {
+        const refreshToken = localStorage.getItem("refresh_token");
+        await authFetch("/auth/logout", {
           method: "POST",
           headers: {
-            Authorization: `Bearer ${token}`,
             "Content-Type": "application/json",
           },
+          ...(refreshToken && {
+            body: JSON.stringify({ refresh_token: refreshToken }),
+          }),
         });
       }
     } catch (error) {
       console.error("Logout request failed:", error);
     } finally {
       localStorage.removeItem("auth_token");
+      localStorage.removeItem("refresh_token");
       localStorage.removeItem("auth_user");
       localStorage.removeItem("enrolledCourses");
       window.location.href = "/auth";
@@ -271,12 +278,11 @@ export default function Dashboard() {
       }
 
       try {
-        const response = await fetch(
-          `http://localhost:8000/user/enroll/${apiCourse.code}`,
+        const response = await authFetch(
+          `/user/enroll/${apiCourse.code}`,
           {
             method: "POST",
             headers: {
-              Authorization: `Bearer ${token}`,
               "Content-Type": "application/json",
             },
           }
@@ -308,12 +314,11 @@ export default function Dashboard() {
 
     if (confirm(`Are you sure you want to unenroll from ${courseCode}?`)) {
       try {
-        const response = await fetch(
-          `http://localhost:8000/user/unenroll/${courseCode}`,
+        const response = await authFetch(
+          `/user/unenroll/${courseCode}`,
           {
             method: "DELETE",
             headers: {
-              Authorization: `Bearer ${token}`,
               "Content-Type": "application/json",
             },
           }
@@ -524,11 +529,15 @@ export default function Dashboard() {
                   <div className="text-xs text-gray-500 mt-1">Courses</div>
                 </div>
                 <div>
-                  <div className="text-2xl font-semibold text-white">-</div>
+                  <div className="text-2xl font-semibold text-white">
+                    {stats ? stats.completed : "-"}
+                  </div>
                   <div className="text-xs text-gray-500 mt-1">Complete</div>
                 </div>
                 <div>
-                  <div className="text-2xl font-semibold text-white">-</div>
+                  <div className="text-2xl font-semibold text-white">
+                    {stats ? stats.pending : "-"}
+                  </div>
                   <div className="text-xs text-gray-500 mt-1">Pending</div>
                 </div>
               </div>
@@ -1164,9 +1173,8 @@ function SchedulePage({
 
   const loadSchedule = async () => {
     try {
-      const response = await fetch("http://localhost:8000/schedule", {
+      const response = await authFetch("/schedule", {
         headers: {
-          Authorization: `Bearer ${token}`,
           "Content-Type": "application/json",
         },
       });
@@ -1185,9 +1193,8 @@ function SchedulePage({
 
   const checkConflicts = async () => {
     try {
-      const response = await fetch("http://localhost:8000/schedule/conflicts", {
+      const response = await authFetch("/schedule/conflicts", {
         headers: {
-          Authorization: `Bearer ${token}`,
           "Content-Type": "application/json",
         },
       });
@@ -1703,10 +1710,9 @@ function AddScheduleForm({
     setError("");
 
     try {
-      const response = await fetch("http://localhost:8000/schedule/manual", {
+      const response = await authFetch("/schedule/manual", {
         method: "POST",
         headers: {
-          Authorization: `Bearer ${token}`,
           "Content-Type": "application/json",
         },
         body: JSON.stringify({
@@ -1987,11 +1993,10 @@ function AssignmentsPage({
       if (filter.course) params.append("course_code", filter.course);
       if (filter.priority) params.append("priority", filter.priority);
 
-      const response = await fetch(
-        `http://localhost:8000/assignments?${params.toString()}`,
+      const response = await authFetch(
+        `/assignments?${params.toString()}`,
         {
           headers: {
-            Authorization: `Bearer ${token}`,
             "Content-Type": "application/json",
           },
         }
@@ -2010,11 +2015,10 @@ function AssignmentsPage({
 
   const loadStats = async () => {
     try {
-      const response = await fetch(
-        "http://localhost:8000/assignments/summary/stats",
+      const response = await authFetch(
+        "/assignments/summary/stats",
         {
           headers: {
-            Authorization: `Bearer ${token}`,
             "Content-Type": "application/json",
           },
         }
@@ -2033,12 +2037,11 @@ function AssignmentsPage({
     newStatus: string
   ) => {
     try {
-      const response = await fetch(
-        `http://localhost:8000/assignments/${assignmentId}`,
+      const response = await authFetch(
+        `/assignments/${assignmentId}`,
         {
           method: "PUT",
           headers: {
-            Authorization: `Bearer ${token}`,
             "Content-Type": "application/json",
           },
           body: JSON.stringify({ status: newStatus }),
@@ -2397,10 +2400,9 @@ function CreateAssignmentForm({
     setError("");
 
     try {
-      const response = await fetch("http://localhost:8000/assignments", {
+      const response = await authFetch("/assignments", {
         method: "POST",
         headers: {
-          Authorization: `Bearer ${token}`,
           "Content-Type": "application/json",
         },
         body: JSON.stringify({
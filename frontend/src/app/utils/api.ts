@@ -31,20 +31,75 @@ function getAuthToken(): string | null {
   return localStorage.getItem("auth_token");
 }
 
-// Generic API request handler
-async function apiRequest(endpoint: string, options: RequestInit = {}) {
+// Trade the stored refresh token for a new token pair; returns false if the session is over
+async function requestRefresh(): Promise<boolean> {
+  const refreshToken = localStorage.getItem("refresh_token");
+  if (!refreshToken) return false;
+
+  const response = await fetch(`${API_BASE_URL}/auth/refresh`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ refresh_token: refreshToken }),
+  });
+  if (!response.ok) {
+    localStorage.removeItem("refresh_token");
+    return false;
+  }
+
+  const data = await response.json();
+  localStorage.setItem("auth_token", data.access_token);
+  localStorage.setItem("refresh_token", data.refresh_token);
+  localStorage.setItem("auth_user", JSON.stringify(data.user));
+  return true;
+}
+
+let refreshInFlight: Promise<boolean> | null = null;
+
+// Requests that hit a 401 together share one refresh, so the refresh token is spent once
+export function refreshSession(): Promise<boolean> {
+  if (typeof window === "undefined") return Promise.resolve(false);
+  if (!refreshInFlight) {
+    refreshInFlight = requestRefresh()
+      .catch(() => false)
+      .finally(() => {
+        refreshInFlight = null;
+      });
+  }
+  return refreshInFlight;
+}
+
+// fetch with the stored access token; an expired token is refreshed once and the request replayed
+export async function authFetch(
+  endpoint: string,
+  options: RequestInit = {},
+  retried = false
+): Promise<Response> {
   const token = getAuthToken();
 
-  const config: RequestInit = {
+  const response = await fetch(`${API_BASE_URL}${endpoint}`, {
     ...options,
     headers: {
-      "Content-Type": "application/json",
       ...(token && { Authorization: `Bearer ${token}` }),
       ...options.headers,
     },
-  };
+  });
 
-  const response = await fetch(`${API_BASE_URL}${endpoint}`, config);
+  if (response.status === 401 && !retried && (await refreshSession())) {
+    return authFetch(endpoint, options, true);
+  }
+
+  return response;
+}
+
+// Generic API request handler
+async function apiRequest(endpoint: string, options: RequestInit = {}) {
+  const response = await authFetch(endpoint, {
+    ...options,
+    headers: {
+      "Content-Type": "application/json",
+      ...options.headers,
+    },
+  });
 
   if (!response.ok) {
     const errorData = await response.json().catch(() => ({}));
@@ -153,8 +208,13 @@ export const scheduleApi = {
 
 // Course API methods
 export const courseApi = {
-  getAll: async (limit: number = 100) => {
-    return apiRequest(`/courses/all?limit=${limit}`);
+  getAll: async (limit: number = 100, after?: string, fields?: string[]) => {
+    const params = new URLSearchParams();
+    params.append("limit", limit.toString());
+    if (after) params.append("after", after);
+    if (fields?.length) params.append("fields", fields.join(","));
+
+    return apiRequest(`/courses/all?${params.toString()}`);
   },
 
   searchCourses: async (